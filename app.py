@@ -1,11 +1,14 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 import plotly.express as px
 import plotly.graph_objects as go
 import snowflake.connector
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Load environment variables
 load_dotenv()
@@ -35,8 +38,8 @@ This dashboard provides insights into inflation trends across EU countries, comb
 Use the sidebar to navigate to different analysis pages.
 """)
 
-# Connect to Snowflake
-@st.cache_data(ttl=3600)
+# Connect to Snowflake (one shared connection, reused across reruns and sessions)
+@st.cache_resource(ttl=3600)
 def get_snowflake_connection():
     return snowflake.connector.connect(
         account=snowflake_account,
@@ -47,13 +50,22 @@ def get_snowflake_connection():
         warehouse=snowflake_warehouse
     )
 
+# Read a query result through the connector's Arrow path instead of building DB-API row tuples
+def fetch_frame(conn, query, params=None):
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        df = cur.fetch_pandas_all()
+    # Unquoted Snowflake identifiers come back upper-case
+    df.columns = df.columns.str.lower()
+    return df
+
 # Function to load data
 @st.cache_data(ttl=3600)
 def load_inflation_data():
     if USE_SAMPLE_DATA:
         st.info("Using sample data for demonstration purposes...")
         # Skip Snowflake connection attempt
-        return generate_sample_data()
+        return optimize_dtypes(generate_sample_data())
     
     try:
         conn = get_snowflake_connection()
@@ -77,69 +89,248 @@ def load_inflation_data():
         ORDER BY
             i.country_name, i.date_key
         """
-        df = pd.read_sql(query, conn)
-        conn.close()
-        return df
+        df = fetch_frame(conn, query)
+        df['date'] = pd.to_datetime(df['date_key'])
+        return optimize_dtypes(df)
     except Exception as e:
         st.warning(f"Could not connect to Snowflake: {e}")
         st.info("Loading sample data for demonstration purposes...")
-        return generate_sample_data()
+        return optimize_dtypes(generate_sample_data())
         
+# Function to summarise the latest reading and the extremes per country inside Snowflake
+@st.cache_data(ttl=3600)
+def load_latest_inflation(countries, yr_lo, yr_hi):
+    try:
+        conn = get_snowflake_connection()
+        placeholders = ', '.join(['%s'] * len(countries))
+        query = f"""
+        WITH filtered AS (
+            SELECT
+                i.*,
+                MAX(i.year) OVER () AS latest_year
+            FROM
+                FACT_INFLATION_RATES i
+            WHERE
+                i.product_code = 'CP00'
+                AND i.country_name IN ({placeholders})
+                AND i.year BETWEEN %s AND %s
+        )
+        SELECT
+            country_name,
+            MAX(date_key) AS date_key,
+            MAX_BY(inflation_rate_yoy, date_key) AS inflation_rate_yoy,
+            MAX_BY(price_index, date_key) AS price_index,
+            MAX_BY(gdp_per_capita, date_key) AS gdp_per_capita,
+            MAX(inflation_rate_yoy) AS max_inflation,
+            MAX_BY(date_key, inflation_rate_yoy) AS max_inflation_date,
+            MIN(inflation_rate_yoy) AS min_inflation,
+            MIN_BY(date_key, inflation_rate_yoy) AS min_inflation_date,
+            SUM(IFF(year = latest_year, inflation_rate_yoy, 0)) AS latest_year_sum,
+            COUNT_IF(year = latest_year AND inflation_rate_yoy IS NOT NULL) AS latest_year_count
+        FROM
+            filtered
+        GROUP BY
+            country_name
+        """
+        return fetch_frame(conn, query, (*countries, yr_lo, yr_hi))
+    except Exception as e:
+        st.warning(f"Could not summarise inflation in Snowflake: {e}")
+        return None
+
+# Same per-country summary as load_latest_inflation, computed from already loaded rows
+def summarize_latest(df):
+    df = df.sort_values('date')
+    yoy = df['inflation_rate_yoy']
+    by_country = yoy.groupby(df['country_name'], observed=True)
+    # Last row per country in a single pass over the category codes
+    codes = df['country_name'].cat.codes.to_numpy()
+    last_idx = np.full(len(df['country_name'].cat.categories), -1)
+    np.maximum.at(last_idx, codes, np.arange(len(codes)))
+    latest = df.iloc[last_idx[last_idx >= 0]].set_index('country_name')
+    # Extremes and latest-year totals in one aggregation call each
+    stats = by_country.agg(['max', 'idxmax', 'min', 'idxmin'])
+    latest_year = yoy.where(df['year'] == df['year'].max()).groupby(df['country_name'], observed=True).agg(['sum', 'count'])
+    
+    return pd.DataFrame({
+        'date_key': latest['date_key'],
+        'inflation_rate_yoy': latest['inflation_rate_yoy'],
+        'price_index': latest['price_index'],
+        'gdp_per_capita': latest['gdp_per_capita'],
+        'max_inflation': stats['max'],
+        'max_inflation_date': df.loc[stats['idxmax'], 'date_key'].set_axis(stats.index),
+        'min_inflation': stats['min'],
+        'min_inflation_date': df.loc[stats['idxmin'], 'date_key'].set_axis(stats.index),
+        'latest_year_sum': latest_year['sum'],
+        'latest_year_count': latest_year['count']
+    }).rename_axis('country_name').reset_index()
+
+# Store repeated labels as categoricals and numbers at the precision the dashboard needs
+def optimize_dtypes(df):
+    for col in ['country_name', 'country_code', 'product_code', 'product_name']:
+        df[col] = df[col].astype('category')
+    return df.astype({
+        'year': 'int16',
+        'month': 'int16',
+        'inflation_rate_yoy': 'float32',
+        'inflation_rate_mom': 'float32',
+        'price_index': 'float32'
+    })
+
+# Sample data is deterministic, so it is generated once and reused across reruns
+@st.cache_data(show_spinner=False)
 def generate_sample_data():
-        # Create sample data for demonstration
-        countries = ['Germany', 'France', 'Spain', 'Italy', 'Netherlands', 'Belgium', 'Austria', 'Portugal']
-        country_codes = ['DE', 'FR', 'ES', 'IT', 'NL', 'BE', 'AT', 'PT']
-        
-        # Generate dates from 2020-01 to 2023-12
-        dates = pd.date_range(start='2020-01-01', end='2023-12-01', freq='MS')
-        years = [d.year for d in dates]
-        months = [d.month for d in dates]
-        date_keys = [d.strftime('%Y-%m-%d') for d in dates]
-        
-        # Create sample data with realistic inflation patterns
-        data = []
-        for i, country in enumerate(countries):
-            base_inflation = 2.0  # Starting inflation rate
-            for j, date in enumerate(dates):
-                # Create realistic inflation patterns with some randomness and trends
-                if date.year == 2021 and date.month >= 6:
-                    # Inflation spike in mid-2021
-                    base_inflation = 3.5 + (i % 3)
-                elif date.year == 2022:
-                    # Higher inflation in 2022
-                    base_inflation = 5.0 + (i % 4)
-                elif date.year == 2023 and date.month <= 6:
-                    # Gradually decreasing in 2023
-                    base_inflation = 4.0 - (date.month * 0.2) + (i % 3)
-                elif date.year == 2023 and date.month > 6:
-                    # Further decrease in late 2023
-                    base_inflation = 2.5 - ((date.month - 6) * 0.1) + (i % 2)
-                
-                # Add some randomness
-                inflation_rate_yoy = base_inflation + (np.random.random() - 0.5)
-                inflation_rate_mom = inflation_rate_yoy / 12 + (np.random.random() - 0.5) * 0.2
-                
-                # Calculate price index (base 100 in 2020-01)
-                price_index = 100 + (j * inflation_rate_mom / 10)
-                
-                # GDP per capita varies by country
-                gdp_per_capita = 30000 + (i * 5000) + (date.year - 2020) * 1000
-                
-                data.append({
-                    'country_code': country_codes[i],
-                    'country_name': country,
-                    'product_code': 'CP00',
-                    'product_name': 'All Items',
-                    'date_key': date_keys[j],
-                    'year': years[j],
-                    'month': months[j],
-                    'inflation_rate_yoy': inflation_rate_yoy,
-                    'inflation_rate_mom': inflation_rate_mom,
-                    'price_index': price_index,
-                    'gdp_per_capita': gdp_per_capita
-                })
+    # Create sample data for demonstration
+    countries = ['Germany', 'France', 'Spain', 'Italy', 'Netherlands', 'Belgium', 'Austria', 'Portugal']
+    country_codes = ['DE', 'FR', 'ES', 'IT', 'NL', 'BE', 'AT', 'PT']
+    
+    # Generate dates from 2020-01 to 2023-12
+    dates = pd.date_range(start='2020-01-01', end='2023-12-01', freq='MS')
+    years = dates.year.to_numpy()
+    months = dates.month.to_numpy()
+    n_countries, n_dates = len(countries), len(dates)
+    
+    # Country index as a column vector so every formula below yields a (country, date) grid
+    ci = np.arange(n_countries)[:, None]
+    
+    # Create realistic inflation patterns with trends; inflation stays at 2.0 until mid-2021
+    base_inflation = np.select(
+        [
+            (years == 2021) & (months >= 6),  # Inflation spike in mid-2021
+            years == 2022,                    # Higher inflation in 2022
+            (years == 2023) & (months <= 6),  # Gradually decreasing in 2023
+            (years == 2023) & (months > 6)    # Further decrease in late 2023
+        ],
+        [
+            3.5 + (ci % 3),
+            5.0 + (ci % 4),
+            4.0 - (months * 0.2) + (ci % 3),
+            2.5 - ((months - 6) * 0.1) + (ci % 2)
+        ],
+        default=2.0
+    )
+    
+    # Add some randomness (seeded for reproducibility)
+    rng = np.random.default_rng(0)
+    inflation_rate_yoy = base_inflation + (rng.random(base_inflation.shape) - 0.5)
+    inflation_rate_mom = inflation_rate_yoy / 12 + (rng.random(base_inflation.shape) - 0.5) * 0.2
+    
+    # Calculate price index (base 100 in 2020-01)
+    price_index = 100 + (np.arange(n_dates) * inflation_rate_mom / 10)
+    
+    # GDP per capita varies by country
+    gdp_per_capita = 30000 + (ci * 5000) + (years - 2020) * 1000
+    
+    # Rows are ordered country by country, matching the flattened (country, date) grids;
+    # columns are built directly in the dtypes optimize_dtypes would give them
+    country_idx = np.repeat(np.arange(n_countries), n_dates)
+    return pd.DataFrame({
+        'country_code': pd.Categorical.from_codes(country_idx, country_codes),
+        'country_name': pd.Categorical.from_codes(country_idx, countries),
+        'product_code': pd.Categorical.from_codes(np.zeros(n_countries * n_dates, dtype=np.int8), ['CP00']),
+        'product_name': pd.Categorical.from_codes(np.zeros(n_countries * n_dates, dtype=np.int8), ['All Items']),
+        'date_key': np.tile(dates.strftime('%Y-%m-%d'), n_countries),
+        'date': np.tile(dates, n_countries),
+        'year': np.tile(years.astype(np.int16), n_countries),
+        'month': np.tile(months.astype(np.int16), n_countries),
+        'inflation_rate_yoy': inflation_rate_yoy.ravel().astype(np.float32),
+        'inflation_rate_mom': inflation_rate_mom.ravel().astype(np.float32),
+        'price_index': price_index.ravel().astype(np.float32),
+        'gdp_per_capita': gdp_per_capita.ravel()
+    })
+
+# Largest-Triangle-Three-Buckets: pick the points that best preserve the shape of a line
+def lttb_indices(x, y, n_out):
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    
+    # First and last points are always kept; the rest are split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    
+    prev = 0
+    for b in range(n_out - 2):
+        start, end = edges[b], edges[b + 1]
+        # Average of the following bucket (just the last point for the final bucket)
+        next_start, next_end = (edges[b + 1], edges[b + 2]) if b + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
         
-        return pd.DataFrame(data)
+        # Keep the point forming the largest triangle with the previous pick and that average
+        area = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev]) -
+            (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(area))
+        selected[b + 1] = prev
+    
+    return selected
+
+# Cap the number of points each line trace sends to the browser
+MAX_POINTS_PER_TRACE = 2000
+
+def downsample_lines(df, x, y, group_col, n_out=MAX_POINTS_PER_TRACE):
+    if len(df) <= n_out:
+        return df
+    
+    x_values = df[x].to_numpy().astype(np.float64)
+    y_values = df[y].to_numpy().astype(np.float64)
+    keep = []
+    for positions in df.groupby(group_col, observed=True).indices.values():
+        positions = positions[np.argsort(x_values[positions], kind='stable')]
+        keep.append(positions[lttb_indices(x_values[positions], y_values[positions], n_out)])
+    return df.iloc[np.sort(np.concatenate(keep))]
+
+# Filter rows for a selection, matching countries on their category codes
+@st.cache_data(ttl=600)
+def get_filtered(data, countries, yr_lo, yr_hi):
+    country_ids = data['country_name'].cat.codes.to_numpy()
+    selected_codes = data['country_name'].cat.categories.get_indexer(list(countries))
+    year_values = data['year'].to_numpy()
+    return data.iloc[
+        np.isin(country_ids, selected_codes) &
+        (year_values >= yr_lo) &
+        (year_values <= yr_hi)
+    ]
+
+# Figures are cached per selection so returning to an earlier filter state skips the rebuild
+@st.cache_data(ttl=600)
+def build_line_fig(data, countries, yr_lo, yr_hi):
+    return px.line(
+        downsample_lines(get_filtered(data, countries, yr_lo, yr_hi), 'date', 'inflation_rate_yoy', 'country_name'),
+        x='date',
+        y='inflation_rate_yoy',
+        color='country_name',
+        title='Inflation Rate Trends by Country',
+        labels={'date': 'Date', 'inflation_rate_yoy': 'Inflation Rate (%)', 'country_name': 'Country'},
+        render_mode='webgl'  # Scattergl traces render on the GPU instead of as SVG nodes
+    )
+
+@st.cache_data(ttl=600)
+def build_bar_fig(latest_data):
+    return px.bar(
+        latest_data,
+        x='country_name',
+        y='inflation_rate_yoy',
+        title=f'Latest Inflation Rates by Country ({latest_data["date_key"].iloc[0]})',
+        labels={'country_name': 'Country', 'inflation_rate_yoy': 'Inflation Rate (%)'},
+        color='inflation_rate_yoy',
+        color_continuous_scale='RdYlGn_r'
+    )
+
+@st.cache_data(ttl=600)
+def build_scatter_fig(latest_data):
+    return px.scatter(
+        latest_data,
+        x='gdp_per_capita',
+        y='inflation_rate_yoy',
+        color='country_name',
+        size='price_index',
+        hover_name='country_name',
+        title='Inflation Rate vs. GDP per Capita',
+        labels={'gdp_per_capita': 'GDP per Capita (USD)', 'inflation_rate_yoy': 'Inflation Rate (%)', 'country_name': 'Country'}
+    )
 
 # Load data
 inflation_data = load_inflation_data()
@@ -156,82 +347,67 @@ selected_countries = st.sidebar.multiselect("Select Countries", countries, defau
 years = sorted(inflation_data['year'].unique())
 selected_years = st.sidebar.slider("Select Year Range", min_value=min(years), max_value=max(years), value=(min(years), max(years)))
 
-# Filter data based on selections
-filtered_data = inflation_data[
-    (inflation_data['country_name'].isin(selected_countries)) &
-    (inflation_data['year'] >= selected_years[0]) &
-    (inflation_data['year'] <= selected_years[1])
-]
+# Filter data based on selections (sorted so the cache key does not depend on pick order)
+selected_key = tuple(sorted(selected_countries))
+yr_lo, yr_hi = int(selected_years[0]), int(selected_years[1])
+filtered_data = get_filtered(inflation_data, selected_key, yr_lo, yr_hi)
     
+# Latest reading and extremes per country; pushed down to Snowflake when it is the data source
+latest_summary = None if USE_SAMPLE_DATA else load_latest_inflation(selected_key, yr_lo, yr_hi)
+if latest_summary is None:
+    latest_summary = summarize_latest(filtered_data)
+
 # Display metrics
 st.subheader("Key Inflation Metrics")
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    latest_year = filtered_data['year'].max()
-    latest_inflation = filtered_data[filtered_data['year'] == latest_year]['inflation_rate_yoy'].mean()
+    latest_inflation = latest_summary['latest_year_sum'].sum() / latest_summary['latest_year_count'].sum()
     st.metric("Latest Average Inflation", f"{latest_inflation:.2f}%")
 
+# Locate the extremes once by position on the raw arrays (NaN-aware, like idxmax/idxmin)
+i_max = int(np.nanargmax(latest_summary['max_inflation'].to_numpy()))
+i_min = int(np.nanargmin(latest_summary['min_inflation'].to_numpy()))
+
 with col2:
-    max_inflation = filtered_data['inflation_rate_yoy'].max()
-    max_country = filtered_data.loc[filtered_data['inflation_rate_yoy'].idxmax(), 'country_name']
-    max_date = filtered_data.loc[filtered_data['inflation_rate_yoy'].idxmax(), 'date_key']
+    max_inflation = latest_summary['max_inflation'].iat[i_max]
+    max_country = latest_summary['country_name'].iat[i_max]
+    max_date = latest_summary['max_inflation_date'].iat[i_max]
     st.metric("Highest Inflation", f"{max_inflation:.2f}%", f"{max_country} ({max_date})")
 
 with col3:
-    min_inflation = filtered_data['inflation_rate_yoy'].min()
-    min_country = filtered_data.loc[filtered_data['inflation_rate_yoy'].idxmin(), 'country_name']
-    min_date = filtered_data.loc[filtered_data['inflation_rate_yoy'].idxmin(), 'date_key']
+    min_inflation = latest_summary['min_inflation'].iat[i_min]
+    min_country = latest_summary['country_name'].iat[i_min]
+    min_date = latest_summary['min_inflation_date'].iat[i_min]
     st.metric("Lowest Inflation", f"{min_inflation:.2f}%", f"{min_country} ({min_date})")
 
 # Visualizations
 st.subheader("Inflation Trends")
     
-# Line chart of inflation rates over time by country
-fig1 = px.line(
-    filtered_data,
-    x='date_key',
-    y='inflation_rate_yoy',
-    color='country_name',
-    title='Inflation Rate Trends by Country',
-    labels={'date_key': 'Date', 'inflation_rate_yoy': 'Inflation Rate (%)', 'country_name': 'Country'}
-)
-st.plotly_chart(fig1, use_container_width=True)
+# Build the three independent figures concurrently; workers get this run's script context so
+# the cached builders behave as they would on the main thread
+latest_data = latest_summary.sort_values('inflation_rate_yoy', ascending=False)
+with ThreadPoolExecutor(max_workers=3, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx())) as ex:
+    # Line chart of inflation rates over time by country
+    f1 = ex.submit(build_line_fig, inflation_data, selected_key, yr_lo, yr_hi)
+    # Bar chart of latest inflation rates by country
+    f2 = ex.submit(build_bar_fig, latest_data)
+    # Scatter plot of inflation vs GDP per capita
+    f3 = ex.submit(build_scatter_fig, latest_data)
+fig1, fig2, fig3 = f1.result(), f2.result(), f3.result()
 
-# Bar chart of latest inflation rates by country
-latest_data = filtered_data.sort_values('date_key').groupby('country_name').last().reset_index()
-latest_data = latest_data.sort_values('inflation_rate_yoy', ascending=False)
-    
-fig2 = px.bar(
-    latest_data,
-    x='country_name',
-    y='inflation_rate_yoy',
-    title=f'Latest Inflation Rates by Country ({latest_data["date_key"].iloc[0]})',
-    labels={'country_name': 'Country', 'inflation_rate_yoy': 'Inflation Rate (%)'},
-    color='inflation_rate_yoy',
-    color_continuous_scale='RdYlGn_r'
-)
+st.plotly_chart(fig1, use_container_width=True)
 st.plotly_chart(fig2, use_container_width=True)
-
-# Scatter plot of inflation vs GDP per capita
-fig3 = px.scatter(
-    latest_data,
-    x='gdp_per_capita',
-    y='inflation_rate_yoy',
-    color='country_name',
-    size='price_index',
-    hover_name='country_name',
-    title='Inflation Rate vs. GDP per Capita',
-    labels={'gdp_per_capita': 'GDP per Capita (USD)', 'inflation_rate_yoy': 'Inflation Rate (%)', 'country_name': 'Country'}
-)
 st.plotly_chart(fig3, use_container_width=True)
 
 # Data table
 st.subheader("Inflation Data")
-st.dataframe(
+# Hand Streamlit an Arrow table of just the shown columns (categoricals go over dictionary-encoded)
+table_data = pa.Table.from_pandas(
     filtered_data[['country_name', 'date_key', 'inflation_rate_yoy', 'inflation_rate_mom', 'price_index', 'gdp_per_capita']],
-    use_container_width=True
+    preserve_index=False
 )
+st.dataframe(table_data, use_container_width=True)
 
 # Information about other pages
 st.subheader("Explore More Data")
@@ -28,8 +28,8 @@ It displays the results of various data quality checks performed on the Eurostat
 World Bank economic data, and Open Food Facts product pricing data.
 """)
 
-# Connect to Snowflake
-@st.cache_data(ttl=3600)
+# Connect to Snowflake (one shared connection, reused across reruns and sessions)
+@st.cache_resource(ttl=3600)
 def get_snowflake_connection():
     try:
         return snowflake.connector.connect(
@@ -44,68 +44,20 @@ def get_snowflake_connection():
         st.warning(f"Could not connect to Snowflake: {e}")
         return None
 
-# Function to load data quality check results
+# Function to load data quality check results and data volume metrics
 @st.cache_data(ttl=3600)
-def load_dq_checks():
+def load_dq_data():
     try:
         conn = get_snowflake_connection()
         if conn is None:
             raise Exception("Could not establish Snowflake connection")
             
-        query = """
+        dq_query = """
         SELECT *
         FROM DQ_CHECKS
         ORDER BY check_name
         """
-        df = pd.read_sql(query, conn)
-        conn.close()
-        return df
-    except Exception as e:
-        st.warning(f"Could not connect to Snowflake: {e}")
-        # Create sample data for demonstration
-        return pd.DataFrame({
-            'check_name': ['eurostat_null_check', 'eurostat_date_check', 'eurostat_value_check', 'worldbank_null_check', 
-                         'worldbank_year_check', 'openfood_null_check', 'openfood_price_check', 'openfood_duplicate_check', 
-                         'volume_check'],
-            'check_description': ['Checks for null values in critical Eurostat data columns', 
-                               'Validates date format and range in Eurostat data',
-                               'Checks for outliers in index values in Eurostat data',
-                               'Checks for null values in critical World Bank data columns',
-                               'Validates year format and range in World Bank data',
-                               'Checks for null values in critical Open Food Facts data columns',
-                               'Validates price values in Open Food Facts data',
-                               'Checks for duplicate record_ids in Open Food Facts data',
-                               'Checks if total data volume meets the 1 million rows requirement'],
-            'check_status': ['PASS', 'PASS', 'PASS', 'PASS', 'FAIL', 'PASS', 'FAIL', 'PASS', 'PASS'],
-            'checked_at': [pd.Timestamp.now()] * 9,
-            'total_records': [250000, 250000, 250000, 150000, 150000, 600000, 600000, 600000, 1000000],
-            'country_code_nulls': [0, None, None, 0, None, None, None, None, None],
-            'product_code_nulls': [0, None, None, None, None, None, None, None, None],
-            'date_nulls': [0, None, None, None, None, None, None, None, None],
-            'index_value_nulls': [0, None, None, None, None, None, None, None, None],
-            'invalid_dates': [None, 0, None, None, 150, None, None, None, None],
-            'min_date': [None, '2020-01-01', None, None, None, None, None, None, None],
-            'max_date': [None, '2023-12-31', None, None, None, None, None, None, None],
-            'min_index': [None, None, 95.2, None, None, None, None, None, None],
-            'max_index': [None, None, 125.7, None, None, None, None, None, None],
-            'outlier_count': [None, None, 0, None, None, None, None, None, None],
-            'negative_or_zero_prices': [None, None, None, None, None, None, 25, None, None],
-            'duplicate_count': [None, None, None, None, None, None, None, 0, None],
-            'eurostat_rows': [None, None, None, None, None, None, None, None, 250000],
-            'worldbank_rows': [None, None, None, None, None, None, None, None, 150000],
-            'openfood_rows': [None, None, None, None, None, None, None, None, 600000],
-            'total_rows': [None, None, None, None, None, None, None, None, 1000000]
-        })
-
-# Function to load data volume metrics
-@st.cache_data(ttl=3600)
-def load_volume_metrics():
-    try:
-        conn = get_snowflake_connection()
-        if conn is None:
-            raise Exception("Could not establish Snowflake connection")
-            
-        query = """
+        volume_query = """
         SELECT 
             'Eurostat' as Source,
             COUNT(*) as Rows
@@ -124,22 +76,88 @@ def load_volume_metrics():
         FROM 
             FACT_PRODUCT_PRICES
         """
-        df = pd.read_sql(query, conn)
-        conn.close()
-        return df
+        # Run both queries in one round trip and read each result set through the Arrow path
+        with conn.cursor() as cur:
+            cur.execute(f"{dq_query}; {volume_query}", num_statements=2)
+            dq_checks = cur.fetch_pandas_all()
+            cur.nextset()
+            volume_metrics = cur.fetch_pandas_all()
+        return dq_checks, volume_metrics
     except Exception as e:
         st.warning(f"Could not connect to Snowflake: {e}")
-        st.info("Loading sample volume metrics data for demonstration purposes...")
-        
-        # Create sample data for demonstration
-        return pd.DataFrame({
-            'Source': ['Eurostat', 'World Bank', 'Open Food Facts'],
-            'Rows': [250000, 150000, 600000]
-        })
+        st.info("Loading sample data quality data for demonstration purposes...")
+        return sample_dq_checks(), sample_volume_metrics()
+
+# Sample data quality check results for demonstration
+def sample_dq_checks():
+    checks = pd.DataFrame({
+        'check_name': ['eurostat_null_check', 'eurostat_date_check', 'eurostat_value_check', 'worldbank_null_check', 
+                     'worldbank_year_check', 'openfood_null_check', 'openfood_price_check', 'openfood_duplicate_check', 
+                     'volume_check'],
+        'check_description': ['Checks for null values in critical Eurostat data columns', 
+                           'Validates date format and range in Eurostat data',
+                           'Checks for outliers in index values in Eurostat data',
+                           'Checks for null values in critical World Bank data columns',
+                           'Validates year format and range in World Bank data',
+                           'Checks for null values in critical Open Food Facts data columns',
+                           'Validates price values in Open Food Facts data',
+                           'Checks for duplicate record_ids in Open Food Facts data',
+                           'Checks if total data volume meets the 1 million rows requirement'],
+        'check_status': ['PASS', 'PASS', 'PASS', 'PASS', 'FAIL', 'PASS', 'FAIL', 'PASS', 'PASS'],
+        'checked_at': [pd.Timestamp.now()] * 9
+    })
+    
+    # Check metrics in long form: only the values each check actually reports
+    metrics = pd.DataFrame([
+        ('eurostat_null_check', 'total_records', 250000),
+        ('eurostat_null_check', 'country_code_nulls', 0),
+        ('eurostat_null_check', 'product_code_nulls', 0),
+        ('eurostat_null_check', 'date_nulls', 0),
+        ('eurostat_null_check', 'index_value_nulls', 0),
+        ('eurostat_date_check', 'total_records', 250000),
+        ('eurostat_date_check', 'invalid_dates', 0),
+        ('eurostat_date_check', 'min_date', '2020-01-01'),
+        ('eurostat_date_check', 'max_date', '2023-12-31'),
+        ('eurostat_value_check', 'total_records', 250000),
+        ('eurostat_value_check', 'min_index', 95.2),
+        ('eurostat_value_check', 'max_index', 125.7),
+        ('eurostat_value_check', 'outlier_count', 0),
+        ('worldbank_null_check', 'total_records', 150000),
+        ('worldbank_null_check', 'country_code_nulls', 0),
+        ('worldbank_year_check', 'total_records', 150000),
+        ('worldbank_year_check', 'invalid_dates', 150),
+        ('openfood_null_check', 'total_records', 600000),
+        ('openfood_price_check', 'total_records', 600000),
+        ('openfood_price_check', 'negative_or_zero_prices', 25),
+        ('openfood_duplicate_check', 'total_records', 600000),
+        ('openfood_duplicate_check', 'duplicate_count', 0),
+        ('volume_check', 'total_records', 1000000),
+        ('volume_check', 'eurostat_rows', 250000),
+        ('volume_check', 'worldbank_rows', 150000),
+        ('volume_check', 'openfood_rows', 600000),
+        ('volume_check', 'total_rows', 1000000)
+    ], columns=['check_name', 'metric', 'value'])
+    
+    # Pivot to the wide layout DQ_CHECKS has, one column per metric in first-seen order
+    metric_columns = metrics.pivot(index='check_name', columns='metric', values='value')[metrics['metric'].unique()]
+    return checks.join(metric_columns, on='check_name').astype({
+        # Arrow-backed strings and nullable integers instead of object columns and NaN-padded floats
+        **dict.fromkeys(['check_name', 'check_description', 'check_status', 'min_date', 'max_date'], 'string[pyarrow]'),
+        **dict.fromkeys(['total_records', 'country_code_nulls', 'product_code_nulls', 'date_nulls', 'index_value_nulls',
+                         'invalid_dates', 'outlier_count', 'negative_or_zero_prices', 'duplicate_count',
+                         'eurostat_rows', 'worldbank_rows', 'openfood_rows', 'total_rows'], 'Int64'),
+        **dict.fromkeys(['min_index', 'max_index'], 'float64')
+    })
+
+# Sample data volume metrics for demonstration
+def sample_volume_metrics():
+    return pd.DataFrame({
+        'Source': ['Eurostat', 'World Bank', 'Open Food Facts'],
+        'Rows': [250000, 150000, 600000]
+    })
 
 # Load data
-dq_checks = load_dq_checks()
-volume_metrics = load_volume_metrics()
+dq_checks, volume_metrics = load_dq_data()
 
 # Continue with the dashboard
 
@@ -196,19 +214,28 @@ if not volume_metrics.empty:
                  delta=f"{total_rows - 1000000:,}",
                  delta_color="normal")
     
-    # Use the volume_metrics DataFrame directly for the pie chart
-    volume_data = volume_metrics
-    
-    fig_pie = px.pie(
-        volume_data,
-        values='Rows',
-        names='Source',
-        title='Data Volume by Source',
+    # Build the pie directly from the few volume rows, skipping Plotly Express's dataframe handling
+    fig_pie = go.Figure(go.Pie(
+        values=volume_metrics['Rows'].to_list(),
+        labels=volume_metrics['Source'].to_list(),
         hole=0.4,
-        color_discrete_sequence=px.colors.qualitative.Set2
-    )
+        marker={'colors': px.colors.qualitative.Set2}
+    ))
+    fig_pie.update_layout(title='Data Volume by Source')
     st.plotly_chart(fig_pie)
 
+# Label every check with its data source once, based on the check name prefix
+source_groups = {
+    'eurostat': 'Eurostat',
+    'worldbank': 'World Bank',
+    'openfood': 'Open Food Facts',
+    'volume': 'Volume'
+}
+check_source = pd.Categorical(
+    dq_checks['check_name'].str.extract(f"^({'|'.join(source_groups)})", expand=False).map(source_groups),
+    categories=list(source_groups.values())
+)
+
 # Create tabs for different views
 tab1, tab2, tab3 = st.tabs(["Check Results", "Source-specific Checks", "Detailed Metrics"])
 
@@ -227,30 +254,17 @@ with tab1:
     fig1.update_layout(showlegend=True, xaxis_tickangle=-45)
     st.plotly_chart(fig1, use_container_width=True)
     
-    # Group checks by source and status
-    source_groups = {
-        'eurostat': 'Eurostat',
-        'worldbank': 'World Bank',
-        'openfood': 'Open Food Facts',
-        'volume': 'Volume'
-    }
-    
-    source_status = []
-    for source_prefix, source_name in source_groups.items():
-        source_checks = dq_checks[dq_checks['check_name'].str.startswith(source_prefix)]
-        passing = len(source_checks[source_checks['check_status'] == 'PASS'])
-        failing = len(source_checks[source_checks['check_status'] == 'FAIL'])
-        total = len(source_checks)
-        if total > 0:
-            source_status.append({
-                'Source': source_name,
-                'Passing': passing,
-                'Failing': failing,
-                'Total': total,
-                'Pass Rate': (passing / total) * 100
-            })
+    # Group checks by source and status in a single pass; sources without checks are dropped
+    status_counts = dq_checks.groupby(check_source, observed=True)['check_status'].value_counts().unstack(fill_value=0)
+    source_totals = status_counts.sum(axis=1)
+    status_counts = status_counts.reindex(columns=['PASS', 'FAIL'], fill_value=0)
     
-    source_status_df = pd.DataFrame(source_status)
+    source_status_df = pd.DataFrame({
+        'Passing': status_counts['PASS'],
+        'Failing': status_counts['FAIL'],
+        'Total': source_totals
+    }).rename_axis('Source').reset_index()
+    source_status_df['Pass Rate'] = (source_status_df['Passing'] / source_status_df['Total']) * 100
     
     if not source_status_df.empty:
         # Create a grouped bar chart of check status by source
@@ -299,7 +313,7 @@ with tab2:
     
     # Filter checks by selected source
     selected_prefix = source_prefixes[selected_source]
-    source_checks = dq_checks[dq_checks['check_name'].str.startswith(selected_prefix)]
+    source_checks = dq_checks[check_source == source_names[selected_source]]
     
     if not source_checks.empty:
         # Display source-specific metrics
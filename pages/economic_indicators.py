@@ -6,17 +6,23 @@ import plotly.graph_objects as go
 import snowflake.connector
 import os
 from dotenv import load_dotenv
+from utils.sample_cache import sample_path, read_sample, save_sample
 
-# Load environment variables
-load_dotenv()
-
-# Snowflake connection parameters
-snowflake_account = os.getenv('SNOWFLAKE_ACCOUNT')
-snowflake_user = os.getenv('SNOWFLAKE_USER')
-snowflake_password = os.getenv('SNOWFLAKE_PASSWORD')
-snowflake_database = os.getenv('SNOWFLAKE_DATABASE', 'DATAEXPERT_STUDENT')
-snowflake_schema = os.getenv('STUDENT_SCHEMA')
-snowflake_warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
+# Load environment variables once per server process rather than re-reading .env on every rerun;
+# .env is only parsed when the variables are not already set in the environment
+@st.cache_resource
+def load_snowflake_params():
+    if not os.getenv('SNOWFLAKE_ACCOUNT'):
+        load_dotenv()
+    # Snowflake connection parameters
+    return {
+        'account': os.getenv('SNOWFLAKE_ACCOUNT'),
+        'user': os.getenv('SNOWFLAKE_USER'),
+        'password': os.getenv('SNOWFLAKE_PASSWORD'),
+        'database': os.getenv('SNOWFLAKE_DATABASE', 'DATAEXPERT_STUDENT'),
+        'schema': os.getenv('STUDENT_SCHEMA'),
+        'warehouse': os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
+    }
 
 # Page configuration
 st.set_page_config(page_title="Economic Indicators", page_icon="📈", layout="wide")
@@ -28,22 +34,45 @@ This dashboard analyzes economic indicators from the World Bank to provide conte
 Explore how GDP per capita, GDP growth, and other economic factors relate to inflation rates.
 """)
 
-# Connect to Snowflake
-@st.cache_data(ttl=3600)
+# Connect to Snowflake; the connection is a shared resource, reopened if it has been closed
+@st.cache_resource(ttl=3600, validate=lambda conn: conn is None or not conn.is_closed())
 def get_snowflake_connection():
     try:
         return snowflake.connector.connect(
-            account=snowflake_account,
-            user=snowflake_user,
-            password=snowflake_password,
-            database=snowflake_database,
-            schema=snowflake_schema,
-            warehouse=snowflake_warehouse
+            **load_snowflake_params(),
+            client_session_keep_alive=True
         )
     except Exception as e:
         st.warning(f"Could not connect to Snowflake: {e}")
         return None
 
+# Read a query result as Arrow-backed pandas batches straight from the connector and build the frame once
+def fetch_frame(conn, query):
+    try:
+        cur = conn.cursor()
+        cur.execute(query)
+    except snowflake.connector.errors.OperationalError:
+        # The cached session has dropped; reconnect once and retry
+        get_snowflake_connection.clear()
+        conn = get_snowflake_connection()
+        if conn is None:
+            raise
+        cur = conn.cursor()
+        cur.execute(query)
+    with cur:
+        columns = [col[0].lower() for col in cur.description]
+        frames = list(cur.fetch_pandas_batches())
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    df = pd.concat(frames, ignore_index=True)
+    df.columns = columns
+    return df
+
+# Store measures as float32 and years as int16, halving the bytes fed to .corr() and Plotly
+def downcast_numeric(df):
+    measure_cols = df.select_dtypes('number').columns.drop('year', errors='ignore')
+    return df.astype({**dict.fromkeys(measure_cols, 'float32'), 'year': 'int16'})
+
 # Function to load economic data
 @st.cache_data(ttl=3600)
 def load_economic_data():
@@ -64,68 +93,75 @@ def load_economic_data():
         FROM 
             INT_ECONOMIC_INDICATORS e
         ORDER BY
-            e.country_name, e.year
+            e.country_name ASC, e.year DESC
         """
-        df = pd.read_sql(query, conn)
-        conn.close()
-        return df
+        df = fetch_frame(conn, query)
+        return downcast_numeric(df)
     except Exception as e:
         st.warning(f"Could not connect to Snowflake: {e}")
         st.info("Loading sample economic data for demonstration purposes...")
         
+        path = sample_path('economic', __file__)
+        cached = read_sample(path, ['country_code', 'country_name', 'year', 'gdp_per_capita', 'cpi', 'inflation_rate', 'gdp_growth_rate'])
+        if cached is not None:
+            return cached
+        
         # Create sample data for demonstration
         countries = ['Germany', 'France', 'Spain', 'Italy', 'Netherlands', 'Belgium', 'Austria', 'Portugal']
         country_codes = ['DE', 'FR', 'ES', 'IT', 'NL', 'BE', 'AT', 'PT']
         
         # Generate years from 2018 to 2023
-        years = list(range(2018, 2024))
+        years = np.arange(2018, 2024)
+        n_countries, n_years = len(countries), len(years)
+        
+        # Country index as a column vector so every formula below yields a (country, year) grid
+        ci = np.arange(n_countries)[:, None]
+        
+        # One draw per (measure, country, year) for GDP, CPI, inflation and growth noise, seeded so
+        # the sample is the same in every process
+        rand = np.random.default_rng(42).random((4, n_countries, n_years))
+        
+        # GDP per capita grows over time from a base that varies by country
+        gdp_per_capita = 30000 + (ci * 5000) + ((years - 2018) * 1000) + (rand[0] * 500)
         
-        # Create sample data with realistic economic patterns
-        data = []
-        for i, country in enumerate(countries):
-            base_gdp = 30000 + (i * 5000)  # Base GDP per capita varies by country
-            for year in years:
-                # GDP per capita grows over time with some country variation
-                gdp_per_capita = base_gdp + ((year - 2018) * 1000) + (np.random.random() * 500)
-                
-                # CPI increases over time
-                cpi = 100 + ((year - 2018) * 2) + (np.random.random() * 1.5)
-                
-                # Inflation rate varies by year with realistic patterns
-                if year <= 2019:
-                    inflation_rate = 1.5 + (np.random.random() - 0.5)
-                elif year == 2020:
-                    inflation_rate = 0.8 + (np.random.random() - 0.5)  # Lower in pandemic
-                elif year == 2021:
-                    inflation_rate = 2.5 + (np.random.random() * 1.5)  # Rising
-                elif year == 2022:
-                    inflation_rate = 5.0 + (np.random.random() * 3.0) + (i % 3)  # Peak
-                else:  # 2023
-                    inflation_rate = 3.0 + (np.random.random() * 2.0) - (i % 2)  # Declining
-                
-                # GDP growth rate also follows realistic patterns
-                if year <= 2019:
-                    gdp_growth_rate = 2.0 + (np.random.random() - 0.5) + (i % 2)
-                elif year == 2020:
-                    gdp_growth_rate = -5.0 + (np.random.random() * 3.0) - (i % 2)  # Pandemic contraction
-                elif year == 2021:
-                    gdp_growth_rate = 5.0 + (np.random.random() * 2.0) + (i % 3)  # Recovery
-                elif year == 2022:
-                    gdp_growth_rate = 2.5 + (np.random.random() - 0.5) - (i % 2)  # Normalizing
-                else:  # 2023
-                    gdp_growth_rate = 1.0 + (np.random.random() - 0.5) + (i % 2)  # Slowing
-                
-                data.append({
-                    'country_code': country_codes[i],
-                    'country_name': country,
-                    'year': year,
-                    'gdp_per_capita': gdp_per_capita,
-                    'cpi': cpi,
-                    'inflation_rate': inflation_rate,
-                    'gdp_growth_rate': gdp_growth_rate
-                })
+        # CPI increases over time
+        cpi = 100 + ((years - 2018) * 2) + (rand[1] * 1.5)
+        
+        # Inflation rate varies by year with realistic patterns
+        inflation_rate = np.select(
+            [years <= 2019, years == 2020, years == 2021, years == 2022],
+            [
+                1.5 + (rand[2] - 0.5),
+                0.8 + (rand[2] - 0.5),               # Lower in pandemic
+                2.5 + (rand[2] * 1.5),               # Rising
+                5.0 + (rand[2] * 3.0) + (ci % 3)     # Peak
+            ],
+            default=3.0 + (rand[2] * 2.0) - (ci % 2)  # Declining in 2023
+        )
+        
+        # GDP growth rate also follows realistic patterns
+        gdp_growth_rate = np.select(
+            [years <= 2019, years == 2020, years == 2021, years == 2022],
+            [
+                2.0 + (rand[3] - 0.5) + (ci % 2),
+                -5.0 + (rand[3] * 3.0) - (ci % 2),   # Pandemic contraction
+                5.0 + (rand[3] * 2.0) + (ci % 3),    # Recovery
+                2.5 + (rand[3] - 0.5) - (ci % 2)     # Normalizing
+            ],
+            default=1.0 + (rand[3] - 0.5) + (ci % 2)  # Slowing in 2023
+        )
         
-        return pd.DataFrame(data)
+        # Rows are built country by country to match the flattened (country, year) grids, then put in
+        # the same country, newest-year-first order the SQL returns
+        return save_sample(downcast_numeric(pd.DataFrame({
+            'country_code': np.repeat(country_codes, n_years),
+            'country_name': np.repeat(countries, n_years),
+            'year': np.tile(years, n_countries),
+            'gdp_per_capita': gdp_per_capita.ravel(),
+            'cpi': cpi.ravel(),
+            'inflation_rate': inflation_rate.ravel(),
+            'gdp_growth_rate': gdp_growth_rate.ravel()
+        }).sort_values(['country_name', 'year'], ascending=[True, False], ignore_index=True)), path)
 
 # Function to load inflation data for comparison
 @st.cache_data(ttl=3600)
@@ -134,93 +170,235 @@ def load_inflation_data():
         conn = get_snowflake_connection()
         if conn is None:
             raise Exception("Could not establish Snowflake connection")
+        # One grouped PIVOT over the four categories instead of four conditional averages per row
         query = """
-        SELECT 
-            i.country_code,
-            i.country_name,
-            i.year,
-            AVG(CASE WHEN i.product_code = 'CP00' THEN i.inflation_rate_yoy ELSE NULL END) as overall_inflation,
-            AVG(CASE WHEN i.product_code = 'CP01' THEN i.inflation_rate_yoy ELSE NULL END) as food_inflation,
-            AVG(CASE WHEN i.product_code = 'CP04' THEN i.inflation_rate_yoy ELSE NULL END) as housing_inflation,
-            AVG(CASE WHEN i.product_code = 'CP07' THEN i.inflation_rate_yoy ELSE NULL END) as transport_inflation
-        FROM 
-            FACT_INFLATION_RATES i
-        WHERE
-            i.product_code IN ('CP00', 'CP01', 'CP04', 'CP07')
-        GROUP BY
-            i.country_code, i.country_name, i.year
+        SELECT *
+        FROM (
+            SELECT
+                i.country_code,
+                i.country_name,
+                i.year,
+                i.product_code,
+                i.inflation_rate_yoy
+            FROM 
+                FACT_INFLATION_RATES i
+            WHERE
+                i.product_code IN ('CP00', 'CP01', 'CP04', 'CP07')
+        )
+        PIVOT (
+            AVG(inflation_rate_yoy) FOR product_code IN ('CP00', 'CP01', 'CP04', 'CP07')
+        ) AS p (
+            country_code, country_name, year,
+            overall_inflation, food_inflation, housing_inflation, transport_inflation
+        )
         ORDER BY
-            i.country_name, i.year
+            country_name ASC, year DESC
         """
-        df = pd.read_sql(query, conn)
-        conn.close()
-        return df
+        df = fetch_frame(conn, query)
+        return downcast_numeric(df)
     except Exception as e:
         st.warning(f"Could not connect to Snowflake: {e}")
         st.info("Loading sample inflation category data for demonstration purposes...")
         
+        path = sample_path('inflation', __file__)
+        cached = read_sample(path, ['country_code', 'country_name', 'year', 'overall_inflation', 'food_inflation', 'housing_inflation', 'transport_inflation'])
+        if cached is not None:
+            return cached
+        
         # Create sample data for demonstration - using the same countries as economic data
         countries = ['Germany', 'France', 'Spain', 'Italy', 'Netherlands', 'Belgium', 'Austria', 'Portugal']
         country_codes = ['DE', 'FR', 'ES', 'IT', 'NL', 'BE', 'AT', 'PT']
         
         # Generate years from 2018 to 2023
-        years = list(range(2018, 2024))
+        years = np.arange(2018, 2024)
+        n_countries, n_years = len(countries), len(years)
+        
+        # Country index as a column vector so every formula below yields a (country, year) grid
+        ci = np.arange(n_countries)[:, None]
+        
+        # Overall inflation follows economic patterns
+        overall_base = np.select(
+            [years <= 2019, years == 2020, years == 2021, years == 2022],
+            [
+                1.5 + (ci % 3) * 0.3,
+                0.8 + (ci % 3) * 0.2,  # Lower in pandemic
+                2.5 + (ci % 3) * 0.5,  # Rising
+                5.0 + (ci % 3) * 1.0   # Peak
+            ],
+            default=3.0 + (ci % 3) * 0.5  # Declining in 2023
+        )
         
-        # Create sample data with realistic inflation patterns by category
-        data = []
-        for i, country in enumerate(countries):
-            for year in years:
-                # Overall inflation follows economic patterns
-                if year <= 2019:
-                    overall_base = 1.5 + (i % 3) * 0.3
-                elif year == 2020:
-                    overall_base = 0.8 + (i % 3) * 0.2  # Lower in pandemic
-                elif year == 2021:
-                    overall_base = 2.5 + (i % 3) * 0.5  # Rising
-                elif year == 2022:
-                    overall_base = 5.0 + (i % 3) * 1.0  # Peak
-                else:  # 2023
-                    overall_base = 3.0 + (i % 3) * 0.5  # Declining
-                
-                # Add randomness
-                overall_inflation = overall_base + (np.random.random() - 0.5)
-                
-                # Food inflation is typically higher
-                food_inflation = overall_inflation * 1.2 + (np.random.random() - 0.5) * 0.5
-                
-                # Housing inflation varies more by country
-                housing_inflation = overall_inflation * (0.8 + (i % 4) * 0.1) + (np.random.random() - 0.5) * 0.7
-                
-                # Transport inflation is more volatile
-                if year == 2022:
-                    # Transport inflation peaked higher in 2022 due to fuel prices
-                    transport_inflation = overall_inflation * 1.5 + (np.random.random() - 0.5) * 1.0
-                else:
-                    transport_inflation = overall_inflation * 1.1 + (np.random.random() - 0.5) * 0.8
-                
-                data.append({
-                    'country_code': country_codes[i],
-                    'country_name': country,
-                    'year': year,
-                    'overall_inflation': overall_inflation,
-                    'food_inflation': food_inflation,
-                    'housing_inflation': housing_inflation,
-                    'transport_inflation': transport_inflation
-                })
+        # Add randomness: one draw per (category, country, year), seeded separately from the
+        # economic sample
+        rand = np.random.default_rng(43).random((4, n_countries, n_years))
+        overall_inflation = overall_base + (rand[0] - 0.5)
         
-        return pd.DataFrame(data)
+        # Food inflation is typically higher
+        food_inflation = overall_inflation * 1.2 + (rand[1] - 0.5) * 0.5
+        
+        # Housing inflation varies more by country
+        housing_inflation = overall_inflation * (0.8 + (ci % 4) * 0.1) + (rand[2] - 0.5) * 0.7
+        
+        # Transport inflation is more volatile and peaked higher in 2022 due to fuel prices
+        transport_inflation = np.where(
+            years == 2022,
+            overall_inflation * 1.5 + (rand[3] - 0.5) * 1.0,
+            overall_inflation * 1.1 + (rand[3] - 0.5) * 0.8
+        )
+        
+        # Rows are built country by country to match the flattened (country, year) grids, then put in
+        # the same country, newest-year-first order the SQL returns
+        return save_sample(downcast_numeric(pd.DataFrame({
+            'country_code': np.repeat(country_codes, n_years),
+            'country_name': np.repeat(countries, n_years),
+            'year': np.tile(years, n_countries),
+            'overall_inflation': overall_inflation.ravel(),
+            'food_inflation': food_inflation.ravel(),
+            'housing_inflation': housing_inflation.ravel(),
+            'transport_inflation': transport_inflation.ravel()
+        }).sort_values(['country_name', 'year'], ascending=[True, False], ignore_index=True)), path)
+
+# Indicators shown in the country comparison charts
+indicators_to_compare = ['gdp_per_capita', 'gdp_growth_rate', 'inflation_rate', 'food_inflation']
+indicator_names = ['GDP per Capita', 'GDP Growth Rate', 'Inflation Rate', 'Food Inflation']
+
+# Merge datasets (cached, so the join only reruns when either source changes); the inflation
+# side is indexed on the join keys so the left join looks rows up by index
+@st.cache_data(ttl=3600)
+def build_combined(economic_data, inflation_data):
+    keys = ['country_code', 'country_name', 'year']
+    combined_data = economic_data.join(inflation_data.set_index(keys), on=keys, how='left')
+    # Repeated country labels as categoricals: less memory, and the country filter compares codes
+    return combined_data.astype({'country_code': 'category', 'country_name': 'category'})
+
+# The derived frames below are cached per filter selection, so revisiting a selection skips the pandas work
+@st.cache_data(ttl=3600, max_entries=32)
+def compute_filtered(combined_data, countries, yr_lo, yr_hi):
+    country_ids = combined_data['country_name'].cat.codes.to_numpy()
+    selected_codes = combined_data['country_name'].cat.categories.get_indexer(list(countries))
+    year_values = combined_data['year'].to_numpy()
+    return combined_data.iloc[
+        np.isin(country_ids, selected_codes) &
+        (year_values >= yr_lo) &
+        (year_values <= yr_hi)
+    ]
+
+# Latest year's rows for each country in the selection
+@st.cache_data(ttl=3600, max_entries=32)
+def compute_latest(combined_data, countries, yr_lo, yr_hi):
+    filtered_data = compute_filtered(combined_data, countries, yr_lo, yr_hi)
+    return filtered_data[filtered_data['year'] == filtered_data['year'].max()]
+
+# Melt the latest data for the grouped bar chart, renaming the indicators before the melt so the
+# readable names come out directly
+@st.cache_data(ttl=3600, max_entries=32)
+def compute_melted(combined_data, countries, yr_lo, yr_hi):
+    latest_data = compute_latest(combined_data, countries, yr_lo, yr_hi)
+    return (
+        latest_data[['country_name'] + indicators_to_compare]
+        .rename(columns=dict(zip(indicators_to_compare, indicator_names)))
+        .melt(id_vars='country_name', var_name='indicator', value_name='value')
+    )
+
+# Correlation matrix between the economic and inflation indicators in the selection
+corr_columns = ['gdp_per_capita', 'gdp_growth_rate', 'inflation_rate', 
+               'overall_inflation', 'food_inflation', 'housing_inflation', 'transport_inflation']
+
+@st.cache_data(ttl=3600, max_entries=32)
+def compute_corr(combined_data, countries, yr_lo, yr_hi):
+    return compute_filtered(combined_data, countries, yr_lo, yr_hi)[corr_columns].corr()
+
+# Normalize the latest values to a 0-1 scale for the radar chart
+@st.cache_data(ttl=3600, max_entries=32)
+def compute_radar(combined_data, countries, yr_lo, yr_hi):
+    latest_data = compute_latest(combined_data, countries, yr_lo, yr_hi)
+    
+    # For rates, we want values closer to 0 to be better (columns whose max is 0 are left as is)
+    rate_cols = ['gdp_growth_rate', 'inflation_rate', 'food_inflation']
+    rates = latest_data[rate_cols].abs()
+    rate_max = rates.max()
+    normalized_rates = np.where(rate_max.to_numpy() > 0, 1 - rates / rate_max, latest_data[rate_cols])
+    
+    # For other indicators like GDP, higher is better (constant columns are left as is)
+    value_cols = ['gdp_per_capita']
+    values = latest_data[value_cols]
+    value_min = values.min()
+    value_span = values.max() - value_min
+    normalized_values = np.where(value_span.to_numpy() > 0, (values - value_min) / value_span, values)
+    
+    # Attach the normalised arrays to the country names rather than copying the whole latest frame
+    return latest_data[['country_name']].assign(
+        **dict(zip(rate_cols, normalized_rates.T)),
+        **dict(zip(value_cols, normalized_values.T))
+    )
+
+# Animated GDP vs. inflation scatter built directly with graph_objects: one frame per year holding one
+# trace per country, fed NumPy arrays so Plotly sends them as typed arrays
+def build_gdp_inflation_fig(plot_data):
+    arrays = {col: plot_data[col].to_numpy() for col in
+              ['gdp_per_capita', 'inflation_rate', 'year', 'overall_inflation', 'food_inflation', 'gdp_growth_rate']}
+    # Add 10 to ensure all values are positive for marker sizing
+    size_value = arrays['gdp_growth_rate'] + 10
+    positions = plot_data.groupby(['year', 'country_name'], sort=False, observed=True).indices
+    country_names = list(dict.fromkeys(plot_data['country_name']))
+    years = sorted(set(arrays['year'].tolist()))
+    colors = px.colors.qualitative.Plotly
+    # Area-scaled markers capped at 20px, as Plotly Express sizes them
+    sizeref = 2.0 * size_value.max() / 20 ** 2 if len(size_value) else 1
+    
+    def year_traces(year):
+        traces = []
+        for i, country in enumerate(country_names):
+            rows = positions.get((year, country), [])
+            traces.append(go.Scatter(
+                x=arrays['gdp_per_capita'][rows],
+                y=arrays['inflation_rate'][rows],
+                mode='markers',
+                name=country,
+                legendgroup=country,
+                marker=dict(color=colors[i % len(colors)], size=size_value[rows], sizemode='area', sizeref=sizeref),
+                hovertext=[country] * len(rows),
+                customdata=np.column_stack([arrays[col][rows] for col in
+                                            ['year', 'overall_inflation', 'food_inflation', 'gdp_growth_rate']]),
+                hovertemplate=(
+                    '<b>%{hovertext}</b><br><br>GDP per Capita (USD)=%{x}<br>Inflation Rate (%)=%{y}'
+                    '<br>year=%{customdata[0]}<br>overall_inflation=%{customdata[1]}'
+                    '<br>food_inflation=%{customdata[2]}<br>GDP Growth Rate (%)=%{customdata[3]}<extra></extra>'
+                )
+            ))
+        return traces
+    
+    frames = [go.Frame(data=year_traces(year), name=str(year)) for year in years]
+    animate_args = dict(frame=dict(duration=500, redraw=False), transition=dict(duration=500), fromcurrent=True)
+    step_args = dict(mode='immediate', frame=dict(duration=0, redraw=False), transition=dict(duration=0))
+    
+    fig = go.Figure(data=frames[0].data if frames else [], frames=frames)
+    fig.update_layout(
+        title='GDP per Capita vs. Inflation Rate',
+        xaxis_title='GDP per Capita (USD)',
+        yaxis_title='Inflation Rate (%)',
+        legend_title_text='Country',
+        updatemenus=[dict(
+            type='buttons', direction='left', showactive=False,
+            x=0.1, y=0, xanchor='right', yanchor='top', pad=dict(t=60, r=10),
+            buttons=[
+                dict(label='&#9654;', method='animate', args=[None, animate_args]),
+                dict(label='&#9724;', method='animate', args=[[None], step_args])
+            ]
+        )],
+        sliders=[dict(
+            active=0, currentvalue=dict(prefix='year='),
+            x=0.1, y=0, len=0.9, xanchor='left', yanchor='top', pad=dict(t=60, b=10),
+            steps=[dict(label=str(year), method='animate', args=[[str(year)], step_args]) for year in years]
+        )]
+    )
+    return fig
 
 # Load data
 economic_data = load_economic_data()
 inflation_data = load_inflation_data()
 
-# Merge datasets
-combined_data = pd.merge(
-    economic_data,
-    inflation_data,
-    on=['country_code', 'country_name', 'year'],
-    how='left'
-)
+combined_data = build_combined(economic_data, inflation_data)
 
 # Sidebar filters
 st.sidebar.header("Filters")
@@ -233,36 +411,33 @@ selected_countries = st.sidebar.multiselect("Select Countries", countries, defau
 years = sorted(combined_data['year'].unique())
 selected_years = st.sidebar.slider("Select Year Range", min_value=min(years), max_value=max(years), value=(min(years), max(years)))
 
-# Filter data based on selections
-filtered_data = combined_data[
-    (combined_data['country_name'].isin(selected_countries)) &
-    (combined_data['year'] >= selected_years[0]) &
-    (combined_data['year'] <= selected_years[1])
-]
+# Filter data based on selections (sorted so the cache key does not depend on pick order)
+selected_key = tuple(sorted(selected_countries))
+yr_lo, yr_hi = int(selected_years[0]), int(selected_years[1])
+filtered_data = compute_filtered(combined_data, selected_key, yr_lo, yr_hi)
 
 # Get the latest data for each country
+latest_data = compute_latest(combined_data, selected_key, yr_lo, yr_hi)
 latest_year = filtered_data['year'].max()
-latest_data = filtered_data[filtered_data['year'] == latest_year]
 
 # Display metrics
 st.subheader("Key Economic Metrics")
 col1, col2, col3, col4 = st.columns(4)
 
+# All four averages in one reduction over the latest rows
+latest_means = latest_data[['gdp_per_capita', 'gdp_growth_rate', 'inflation_rate', 'food_inflation']].mean()
+
 with col1:
-    avg_gdp = latest_data['gdp_per_capita'].mean()
-    st.metric("Avg. GDP per Capita", f"${avg_gdp:,.2f}")
+    st.metric("Avg. GDP per Capita", f"${latest_means['gdp_per_capita']:,.2f}")
 
 with col2:
-    avg_growth = latest_data['gdp_growth_rate'].mean()
-    st.metric("Avg. GDP Growth", f"{avg_growth:.2f}%")
+    st.metric("Avg. GDP Growth", f"{latest_means['gdp_growth_rate']:.2f}%")
 
 with col3:
-    avg_inflation = latest_data['inflation_rate'].mean()
-    st.metric("Avg. Inflation Rate", f"{avg_inflation:.2f}%")
+    st.metric("Avg. Inflation Rate", f"{latest_means['inflation_rate']:.2f}%")
 
 with col4:
-    avg_food_inflation = latest_data['food_inflation'].mean()
-    st.metric("Avg. Food Inflation", f"{avg_food_inflation:.2f}%")
+    st.metric("Avg. Food Inflation", f"{latest_means['food_inflation']:.2f}%")
 
 # Visualizations
 st.subheader("Economic Indicators Analysis")
@@ -271,29 +446,8 @@ st.subheader("Economic Indicators Analysis")
 tab1, tab2, tab3 = st.tabs(["GDP vs Inflation", "Economic Trends", "Country Comparison"])
 
 with tab1:
-    # Scatter plot of GDP per capita vs. inflation rate
-    # Create a copy of the dataframe with adjusted gdp_growth_rate for sizing
-    plot_data = filtered_data.copy()
-    # Add 10 to ensure all values are positive for marker sizing
-    plot_data['size_value'] = plot_data['gdp_growth_rate'] + 10
-    
-    fig1 = px.scatter(
-        plot_data,
-        x='gdp_per_capita',
-        y='inflation_rate',
-        color='country_name',
-        size='size_value',  # Use the adjusted positive values
-        hover_name='country_name',
-        hover_data=['year', 'overall_inflation', 'food_inflation', 'gdp_growth_rate'],
-        animation_frame='year',
-        title='GDP per Capita vs. Inflation Rate',
-        labels={
-            'gdp_per_capita': 'GDP per Capita (USD)',
-            'inflation_rate': 'Inflation Rate (%)',
-            'country_name': 'Country',
-            'gdp_growth_rate': 'GDP Growth Rate (%)'
-        }
-    )
+    # Scatter plot of GDP per capita vs. inflation rate, animated by year
+    fig1 = build_gdp_inflation_fig(filtered_data)
     fig1.update_layout(height=600)
     st.plotly_chart(fig1, use_container_width=True)
     
@@ -301,9 +455,7 @@ with tab1:
     st.subheader("Correlation Between Economic Indicators")
     
     # Calculate correlation matrix
-    corr_columns = ['gdp_per_capita', 'gdp_growth_rate', 'inflation_rate', 
-                   'overall_inflation', 'food_inflation', 'housing_inflation', 'transport_inflation']
-    corr_data = filtered_data[corr_columns].corr()
+    corr_data = compute_corr(combined_data, selected_key, yr_lo, yr_hi)
     
     fig2 = px.imshow(
         corr_data,
@@ -361,21 +513,7 @@ with tab3:
     st.subheader("Country Economic Comparison")
     
     # Bar chart comparing latest economic indicators across countries
-    # Melt the data for easier plotting
-    indicators_to_compare = ['gdp_per_capita', 'gdp_growth_rate', 'inflation_rate', 'food_inflation']
-    indicator_names = ['GDP per Capita', 'GDP Growth Rate', 'Inflation Rate', 'Food Inflation']
-    
-    melted_data = pd.melt(
-        latest_data,
-        id_vars=['country_name'],
-        value_vars=indicators_to_compare,
-        var_name='indicator',
-        value_name='value'
-    )
-    
-    # Map indicator codes to readable names
-    indicator_map = dict(zip(indicators_to_compare, indicator_names))
-    melted_data['indicator'] = melted_data['indicator'].map(indicator_map)
+    melted_data = compute_melted(combined_data, selected_key, yr_lo, yr_hi)
     
     # Create grouped bar chart
     fig5 = px.bar(
@@ -401,30 +539,18 @@ with tab3:
     st.subheader("Country Economic Profile Comparison")
     
     # Prepare data for radar chart
-    # Normalize values to 0-1 scale for comparison
-    radar_data = latest_data.copy()
-    
-    for col in indicators_to_compare:
-        if col == 'gdp_growth_rate' or col == 'inflation_rate' or col == 'food_inflation':
-            # For rates, we want values closer to 0 to be better
-            max_val = radar_data[col].abs().max()
-            if max_val > 0:
-                radar_data[col] = 1 - (radar_data[col].abs() / max_val)
-        else:
-            # For other indicators like GDP, higher is better
-            min_val = radar_data[col].min()
-            max_val = radar_data[col].max()
-            if max_val > min_val:
-                radar_data[col] = (radar_data[col] - min_val) / (max_val - min_val)
+    radar_data = compute_radar(combined_data, selected_key, yr_lo, yr_hi)
     
     # Create radar chart
     fig6 = go.Figure()
     
-    for country in radar_data['country_name'].unique():
-        country_data = radar_data[radar_data['country_name'] == country]
-        
+    # Pull each country's (first) row of values out once as a NumPy matrix
+    country_rows = radar_data.drop_duplicates('country_name')
+    radar_values = country_rows[indicators_to_compare].to_numpy()
+    
+    for i, country in enumerate(country_rows['country_name']):
         fig6.add_trace(go.Scatterpolar(
-            r=[country_data[col].iloc[0] for col in indicators_to_compare],
+            r=radar_values[i],
             theta=indicator_names,
             fill='toself',
             name=country
@@ -447,7 +573,7 @@ st.dataframe(
     filtered_data[[
         'country_name', 'year', 'gdp_per_capita', 'gdp_growth_rate',
         'inflation_rate', 'overall_inflation', 'food_inflation'
-    ]].sort_values(['country_name', 'year'], ascending=[True, False]),
+    ]],
     use_container_width=True
 )
 
@@ -2,10 +2,9 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
-import plotly.graph_objects as go
-import snowflake.connector
 import os
 from dotenv import load_dotenv
+from utils.sample_cache import sample_path, read_sample, save_sample
 
 # Load environment variables
 load_dotenv()
@@ -28,10 +27,12 @@ This dashboard analyzes inflation rates across different COICOP product categori
 Explore how inflation varies across different types of products and services.
 """)
 
-# Connect to Snowflake
-@st.cache_data(ttl=3600)
+# Connect to Snowflake; the connector is imported on first use, so without it the page falls back to sample data.
+# The connection is a shared resource, reopened if it has been closed
+@st.cache_resource(ttl=3600, validate=lambda conn: conn is None or not conn.is_closed())
 def get_snowflake_connection():
     try:
+        import snowflake.connector
         return snowflake.connector.connect(
             account=snowflake_account,
             user=snowflake_user,
@@ -44,6 +45,32 @@ def get_snowflake_connection():
         st.warning(f"Could not connect to Snowflake: {e}")
         return None
 
+# Read a query result through the connector's Arrow path instead of building DB-API row tuples
+def fetch_frame(conn, query, params=None):
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        df = cur.fetch_pandas_all()
+    # Unquoted Snowflake identifiers come back upper-case
+    df.columns = df.columns.str.lower()
+    return df
+
+# Store the repeated labels as categoricals and parse date_key once, so the filters, pivots and
+# groupbys below work on integer codes and datetime64 values instead of Python strings; date_ord
+# numbers the months so the latest period is found with integer comparisons
+def prepare_inflation(df):
+    df = df.astype({col: 'category' for col in
+                    ['country_code', 'country_name', 'product_code', 'product_name', 'parent_product_code']})
+    df['date_key'] = pd.to_datetime(df['date_key'], format='%Y-%m-%d')
+    df['date_ord'] = df['year'].astype('int32') * 12 + df['month']
+    return df
+
+# Columns of the prepared inflation frame, checked when the cached sample is read back
+INFLATION_COLUMNS = [
+    'country_code', 'country_name', 'product_code', 'product_name', 'date_key', 'year', 'month',
+    'inflation_rate_yoy', 'inflation_rate_mom', 'price_index', 'product_level', 'parent_product_code',
+    'date_ord'
+]
+
 # Function to load data
 @st.cache_data(ttl=3600)
 def load_inflation_data():
@@ -71,13 +98,17 @@ def load_inflation_data():
         ORDER BY
             i.country_name, i.product_code, i.date_key
         """
-        df = pd.read_sql(query, conn)
-        conn.close()
-        return df
+        df = fetch_frame(conn, query)
+        return prepare_inflation(df)
     except Exception as e:
         st.warning(f"Could not connect to Snowflake: {e}")
         st.info("Loading sample data for demonstration purposes...")
         
+        path = sample_path('category_inflation', __file__)
+        cached = read_sample(path, INFLATION_COLUMNS)
+        if cached is not None:
+            return cached
+        
         # Create sample data for demonstration
         countries = ['Germany', 'France', 'Spain', 'Italy', 'Netherlands', 'Belgium', 'Austria', 'Portugal']
         country_codes = ['DE', 'FR', 'ES', 'IT', 'NL', 'BE', 'AT', 'PT']
@@ -129,73 +160,157 @@ def load_inflation_data():
         
         # Generate dates from 2020-01 to 2023-12
         dates = pd.date_range(start='2020-01-01', end='2023-12-01', freq='MS')
-        years = [d.year for d in dates]
-        months = [d.month for d in dates]
-        date_keys = [d.strftime('%Y-%m-%d') for d in dates]
+        years = dates.year.to_numpy()
+        months = dates.month.to_numpy()
+        date_keys = dates.strftime('%Y-%m-%d').to_numpy()
+        
+        # Flat (country, product, date) indices over the full Cartesian product, one entry per row
+        n_countries, n_products, n_dates = len(countries), len(product_categories), len(dates)
+        ci = np.repeat(np.arange(n_countries), n_products * n_dates)
+        pi = np.tile(np.repeat(np.arange(n_products), n_dates), n_countries)
+        di = np.tile(np.arange(n_dates), n_countries * n_products)
+        n_rows = len(ci)
+        
+        # Different product categories have different inflation patterns, classified once per product
+        product_codes = np.array([product['code'] for product in product_categories])
+        factor_by_product = np.select(
+            [
+                np.char.startswith(product_codes, 'CP01'),  # Food
+                np.char.startswith(product_codes, 'CP04'),  # Housing
+                np.char.startswith(product_codes, 'CP07'),  # Transport
+                product_codes == 'CP06',                    # Health
+                product_codes == 'CP08'                     # Communications
+            ],
+            [
+                1.3,  # Food inflation typically higher
+                1.1,
+                1.4,  # Transport more volatile
+                0.7,  # Health typically lower
+                0.5   # Communications often deflationary
+            ],
+            default=1.0
+        )
+        is_energy = product_codes == 'CP045'
+        is_food = np.char.startswith(product_codes, 'CP011')
+        
+        category_factor = factor_by_product[pi]
+        year, month = years[di], months[di]
+        
+        # Energy crisis affected housing costs more and food prices also spiked in 2022
+        crisis_multiplier = np.where(is_energy[pi], 2.0, np.where(is_food[pi], 1.5, 1.0))
+        
+        # Create realistic inflation patterns with some randomness and trends
+        base_inflation = np.select(
+            [
+                (year == 2021) & (month >= 6),
+                year == 2022,
+                (year == 2023) & (month <= 6),
+                (year == 2023) & (month > 6)
+            ],
+            [
+                3.5 * category_factor + (ci % 3),                             # Inflation spike in mid-2021
+                (5.0 * category_factor + (ci % 4)) * crisis_multiplier,       # Higher inflation in 2022
+                4.0 * category_factor - (month * 0.1) + (ci % 3),             # Gradually decreasing in 2023
+                2.5 * category_factor - ((month - 6) * 0.1) + (ci % 2)        # Further decrease in late 2023
+            ],
+            default=2.0  # Starting inflation rate
+        )
         
-        # Create sample data with realistic inflation patterns
-        data = []
-        for i, country in enumerate(countries):
-            for product in product_categories:
-                base_inflation = 2.0  # Starting inflation rate
-                
-                # Different product categories have different inflation patterns
-                category_factor = 1.0
-                if product['code'] == 'CP01' or product['code'].startswith('CP01'):  # Food
-                    category_factor = 1.3  # Food inflation typically higher
-                elif product['code'] == 'CP04' or product['code'].startswith('CP04'):  # Housing
-                    category_factor = 1.1
-                elif product['code'] == 'CP07' or product['code'].startswith('CP07'):  # Transport
-                    category_factor = 1.4  # Transport more volatile
-                elif product['code'] == 'CP06':  # Health
-                    category_factor = 0.7  # Health typically lower
-                elif product['code'] == 'CP08':  # Communications
-                    category_factor = 0.5  # Communications often deflationary
-                
-                for j, date in enumerate(dates):
-                    # Create realistic inflation patterns with some randomness and trends
-                    if date.year == 2021 and date.month >= 6:
-                        # Inflation spike in mid-2021
-                        base_inflation = 3.5 * category_factor + (i % 3)
-                    elif date.year == 2022:
-                        # Higher inflation in 2022
-                        base_inflation = 5.0 * category_factor + (i % 4)
-                        # Energy crisis affected housing costs more
-                        if product['code'] == 'CP045':
-                            base_inflation *= 2.0
-                        # Food prices also spiked
-                        elif product['code'].startswith('CP011'):
-                            base_inflation *= 1.5
-                    elif date.year == 2023 and date.month <= 6:
-                        # Gradually decreasing in 2023
-                        base_inflation = 4.0 * category_factor - (date.month * 0.1) + (i % 3)
-                    elif date.year == 2023 and date.month > 6:
-                        # Further decrease in late 2023
-                        base_inflation = 2.5 * category_factor - ((date.month - 6) * 0.1) + (i % 2)
-                    
-                    # Add some randomness
-                    inflation_rate_yoy = base_inflation + (np.random.random() - 0.5)
-                    inflation_rate_mom = inflation_rate_yoy / 12 + (np.random.random() - 0.5) * 0.2
-                    
-                    # Calculate price index (base 100 in 2020-01)
-                    price_index = 100 + (j * inflation_rate_mom / 10)
-                    
-                    data.append({
-                        'country_code': country_codes[i],
-                        'country_name': country,
-                        'product_code': product['code'],
-                        'product_name': product['name'],
-                        'date_key': date_keys[j],
-                        'year': years[j],
-                        'month': months[j],
-                        'inflation_rate_yoy': inflation_rate_yoy,
-                        'inflation_rate_mom': inflation_rate_mom,
-                        'price_index': price_index,
-                        'product_level': product['level'],
-                        'parent_product_code': product['parent']
-                    })
+        # Add some randomness: both noise terms for every row in one draw from a seeded generator
+        noise = np.random.default_rng(42).random((n_rows, 2))
+        inflation_rate_yoy = base_inflation + (noise[:, 0] - 0.5)
+        inflation_rate_mom = inflation_rate_yoy / 12 + (noise[:, 1] - 0.5) * 0.2
+        
+        # Calculate price index (base 100 in 2020-01)
+        price_index = 100 + (di * inflation_rate_mom / 10)
+        
+        return save_sample(prepare_inflation(pd.DataFrame({
+            'country_code': np.array(country_codes)[ci],
+            'country_name': np.array(countries)[ci],
+            'product_code': product_codes[pi],
+            'product_name': np.array([product['name'] for product in product_categories])[pi],
+            'date_key': date_keys[di],
+            'year': year,
+            'month': month,
+            'inflation_rate_yoy': inflation_rate_yoy,
+            'inflation_rate_mom': inflation_rate_mom,
+            'price_index': price_index,
+            'product_level': np.array([product['level'] for product in product_categories])[pi],
+            'parent_product_code': np.array([product['parent'] for product in product_categories], dtype=object)[pi]
+        })), path)
+
+# Distinct filter values, so the sidebar can be built without downloading the fact table
+@st.cache_data(ttl=3600)
+def load_filter_options():
+    try:
+        conn = get_snowflake_connection()
+        if conn is None:
+            # get_snowflake_connection has already reported why
+            return None
         
-        return pd.DataFrame(data)
+        query = """
+        SELECT DISTINCT
+            i.country_name,
+            i.product_level,
+            i.year
+        FROM 
+            FACT_INFLATION_RATES i
+        """
+        return fetch_frame(conn, query)
+    except Exception as e:
+        st.warning(f"Could not load the filter options from Snowflake: {e}")
+        return None
+
+# Rows for the current filter selection only, with the filters applied in Snowflake
+@st.cache_data(ttl=3600)
+def load_filtered_inflation(countries, levels, yr_lo, yr_hi):
+    try:
+        conn = get_snowflake_connection()
+        if conn is None:
+            raise Exception("Could not establish Snowflake connection")
+        
+        # An empty selection becomes IN (NULL), which matches no rows
+        country_placeholders = ', '.join(['%s'] * len(countries)) or 'NULL'
+        level_placeholders = ', '.join(['%s'] * len(levels)) or 'NULL'
+        query = f"""
+        SELECT 
+            i.country_code,
+            i.country_name,
+            i.product_code,
+            i.product_name,
+            i.date_key,
+            i.year,
+            i.month,
+            i.inflation_rate_yoy,
+            i.inflation_rate_mom,
+            i.price_index,
+            i.product_level,
+            i.parent_product_code
+        FROM 
+            FACT_INFLATION_RATES i
+        WHERE
+            i.country_name IN ({country_placeholders})
+            AND i.product_level IN ({level_placeholders})
+            AND i.year BETWEEN %s AND %s
+        ORDER BY
+            i.country_name, i.product_code, i.date_key
+        """
+        return prepare_inflation(fetch_frame(conn, query, (*countries, *levels, yr_lo, yr_hi)))
+    except Exception as e:
+        st.warning(f"Could not filter inflation data in Snowflake: {e}")
+        return None
+
+# Same selection as load_filtered_inflation, applied to already loaded rows (cached per selection)
+@st.cache_data(ttl=3600, max_entries=32)
+def filter_inflation(inflation_data, countries, levels, yr_lo, yr_hi):
+    selected_codes = inflation_data['country_name'].cat.categories.get_indexer(list(countries))
+    year_values = inflation_data['year'].to_numpy()
+    return inflation_data[np.logical_and.reduce([
+        np.isin(inflation_data['country_name'].cat.codes.to_numpy(), selected_codes),
+        np.isin(inflation_data['product_level'].to_numpy(), list(levels)),
+        year_values >= yr_lo,
+        year_values <= yr_hi
+    ])]
 
 # Function to load product hierarchy
 @st.cache_data(ttl=3600)
@@ -213,13 +328,17 @@ def load_product_hierarchy():
         ORDER BY
             p.product_code
         """
-        df = pd.read_sql(query, conn)
-        conn.close()
+        df = fetch_frame(conn, query)
         return df
     except Exception as e:
         st.warning(f"Could not connect to Snowflake: {e}")
         st.info("Loading sample product hierarchy data for demonstration purposes...")
         
+        path = sample_path('product_hierarchy', __file__)
+        cached = read_sample(path, ['product_code', 'product_name', 'category_description', 'main_category'])
+        if cached is not None:
+            return cached
+        
         # Create sample product hierarchy data that matches the COICOP categories in load_inflation_data
         product_hierarchy = [
             # Level 1 - Main categories
@@ -265,37 +384,166 @@ def load_product_hierarchy():
             {'product_code': 'CP073', 'product_name': 'Transport Services', 'category_description': 'Rail, road, air transport', 'main_category': 'Transport'}
         ]
         
-        return pd.DataFrame(product_hierarchy)
+        return save_sample(pd.DataFrame(product_hierarchy), path)
 
-# Load data
-inflation_data = load_inflation_data()
+# Main categories (4-character codes) mapped to their code and subcategory codes, built once per
+# hierarchy rather than re-scanning the product codes with string methods on every rerun
+@st.cache_data(ttl=3600)
+def hierarchy_index(product_hierarchy):
+    code_len = product_hierarchy['product_code'].str.len()
+    main = product_hierarchy[code_len == 4]
+    # Subcategories grouped by the main category code they extend, e.g. CP011 and CP0111 under CP01
+    sub_codes = product_hierarchy.loc[code_len > 4, 'product_code']
+    subs_by_main = sub_codes.groupby(sub_codes.str[:4], sort=False).agg(list).to_dict()
+    index = {}
+    for name, code in zip(main['product_name'], main['product_code']):
+        if name not in index:
+            index[name] = (code, subs_by_main.get(code, []))
+    return index
+
+# Chart aggregates, cached so tab switches and unrelated widget changes reuse them for the same filters
+@st.cache_data(ttl=3600, max_entries=32)
+def compute_latest(filtered_data):
+    return filtered_data[filtered_data['date_ord'] == filtered_data['date_ord'].max()]
+
+@st.cache_data(ttl=3600, max_entries=32)
+def compute_category_pivot(latest_data):
+    return latest_data.groupby(['country_name', 'product_name'], observed=True)['inflation_rate_yoy'].mean().unstack('product_name')
+
+@st.cache_data(ttl=3600, max_entries=32)
+def compute_category_avg(latest_data):
+    return (
+        latest_data.groupby('product_name', observed=True)['inflation_rate_yoy']
+        .mean()
+        .sort_values(ascending=False)
+        .reset_index()
+    )
+
+@st.cache_data(ttl=3600, max_entries=32)
+def compute_yearly_pivot(product_data):
+    # Aggregate by year and product
+    return product_data.groupby(['product_name', 'year'], observed=True)['inflation_rate_yoy'].mean().unstack('year')
+
+# One mean point per date for each trend line (and country facet), so each line is drawn from a
+# single series instead of stacking every country's readings onto it
+@st.cache_data(ttl=3600, max_entries=32)
+def compute_trend(data, keys):
+    return data.groupby(list(keys) + ['date_key'], observed=True, sort=False)['inflation_rate_yoy'].mean().reset_index()
+
+# Figures are cached on their (small, aggregated) inputs so tab switches and unrelated widget changes
+# reuse the built figure instead of rerunning Plotly Express
+@st.cache_data(ttl=3600, max_entries=32)
+def build_category_heatmap(pivot_data):
+    fig = px.imshow(
+        pivot_data,
+        labels=dict(x="Product Category", y="Country", color="Inflation Rate (%)"),
+        x=pivot_data.columns,
+        y=pivot_data.index,
+        color_continuous_scale='RdYlGn_r',
+        title='Latest Inflation Rates by Country and Product Category'
+    )
+    fig.update_layout(height=600)
+    return fig
+
+@st.cache_data(ttl=3600, max_entries=32)
+def build_category_bar(category_avg):
+    return px.bar(
+        category_avg,
+        x='product_name',
+        y='inflation_rate_yoy',
+        title='Average Inflation Rate by Product Category',
+        labels={'product_name': 'Product Category', 'inflation_rate_yoy': 'Avg. Inflation Rate (%)'},
+        color='inflation_rate_yoy',
+        color_continuous_scale='RdYlGn_r'
+    )
+
+@st.cache_data(ttl=3600, max_entries=32)
+def build_hierarchy_treemap(latest_hierarchy, main_category):
+    fig = px.treemap(
+        latest_hierarchy,
+        path=[px.Constant("All"), 'product_level', 'product_name'],
+        values='price_index',
+        color='inflation_rate_yoy',
+        color_continuous_scale='RdYlGn_r',
+        title=f'Hierarchical View of {main_category} and Subcategories',
+        hover_data=['inflation_rate_yoy', 'price_index']
+    )
+    fig.update_layout(height=600)
+    return fig
+
+@st.cache_data(ttl=3600, max_entries=32)
+def build_hierarchy_trend(hierarchy_data, main_category):
+    return px.line(
+        compute_trend(hierarchy_data, ('product_name',)),
+        x='date_key',
+        y='inflation_rate_yoy',
+        color='product_name',
+        title=f'Inflation Trends for {main_category} and Subcategories',
+        labels={'date_key': 'Date', 'inflation_rate_yoy': 'Inflation Rate (%)', 'product_name': 'Product Category'},
+        render_mode='webgl'
+    )
+
+@st.cache_data(ttl=3600, max_entries=32)
+def build_product_trend(product_data):
+    fig = px.line(
+        compute_trend(product_data, ('country_name', 'product_name')),
+        x='date_key',
+        y='inflation_rate_yoy',
+        color='product_name',
+        facet_col='country_name',
+        facet_col_wrap=2,
+        title='Inflation Rate Trends by Product Category and Country',
+        labels={'date_key': 'Date', 'inflation_rate_yoy': 'Inflation Rate (%)', 'product_name': 'Product Category'},
+        render_mode='webgl'
+    )
+    fig.update_layout(height=800)
+    return fig
+
+@st.cache_data(ttl=3600, max_entries=32)
+def build_yearly_heatmap(pivot_yearly):
+    return px.imshow(
+        pivot_yearly,
+        labels=dict(x="Year", y="Product Category", color="Inflation Rate (%)"),
+        x=pivot_yearly.columns,
+        y=pivot_yearly.index,
+        color_continuous_scale='RdYlGn_r',
+        title='Inflation Rate Heatmap by Product Category and Year'
+    )
+
+# Load data; the full fact table is only loaded when Snowflake can't serve the filtered queries
+filter_options = load_filter_options()
+inflation_data = load_inflation_data() if filter_options is None else None
+if inflation_data is not None:
+    filter_options = inflation_data
 product_hierarchy = load_product_hierarchy()
+main_category_index = hierarchy_index(product_hierarchy)
 
 # Sidebar filters
 st.sidebar.header("Filters")
 # Country filter
-countries = sorted(inflation_data['country_name'].unique())
+countries = sorted(filter_options['country_name'].unique())
 selected_countries = st.sidebar.multiselect("Select Countries", default=countries[:3] if len(countries) > 3 else countries, options=countries, key='sidebar_countries_select')
 
 # Product level filter
-product_levels = sorted(inflation_data['product_level'].unique())
+product_levels = sorted(filter_options['product_level'].unique())
 selected_levels = st.sidebar.multiselect("Select Product Hierarchy Level", default=product_levels, options=product_levels, format_func=lambda x: f"Level {x}: {'Main Categories' if x == 1 else 'Subcategories' if x == 2 else 'Detailed Categories'}", key='sidebar_levels_select')
 
 # Date range filter
-years = sorted(inflation_data['year'].unique())
+years = sorted(filter_options['year'].unique())
 selected_years = st.sidebar.slider("Select Year Range", min_value=min(years), max_value=max(years), value=(min(years), max(years)))
 
-# Filter data based on selections
-filtered_data = inflation_data[
-    (inflation_data['country_name'].isin(selected_countries)) &
-    (inflation_data['product_level'].isin(selected_levels)) &
-    (inflation_data['year'] >= selected_years[0]) &
-    (inflation_data['year'] <= selected_years[1])
-]
+# Filter data based on selections, in Snowflake when it is the data source
+selected_key = tuple(sorted(selected_countries))
+levels_key = tuple(sorted(int(level) for level in selected_levels))
+yr_lo, yr_hi = int(selected_years[0]), int(selected_years[1])
+filtered_data = None if inflation_data is not None else load_filtered_inflation(selected_key, levels_key, yr_lo, yr_hi)
+if filtered_data is None:
+    if inflation_data is None:
+        inflation_data = load_inflation_data()
+    filtered_data = filter_inflation(inflation_data, selected_key, levels_key, yr_lo, yr_hi)
 
 # Get the latest data for each country and product
-latest_date = filtered_data['date_key'].max()
-latest_data = filtered_data[filtered_data['date_key'] == latest_date]
+latest_data = compute_latest(filtered_data)
 
 # Display metrics
 st.subheader("Latest Inflation Metrics by Product Category")
@@ -305,37 +553,15 @@ tab1, tab2, tab3 = st.tabs(["Category Comparison", "Hierarchy Analysis", "Time T
 
 with tab1:
     # Heatmap of latest inflation rates by country and main product categories
-    pivot_data = latest_data.pivot_table(
-        values='inflation_rate_yoy',
-        index='country_name',
-        columns='product_name',
-        aggfunc='mean'
-    )
+    pivot_data = compute_category_pivot(latest_data)
     
-    fig1 = px.imshow(
-        pivot_data,
-        labels=dict(x="Product Category", y="Country", color="Inflation Rate (%)"),
-        x=pivot_data.columns,
-        y=pivot_data.index,
-        color_continuous_scale='RdYlGn_r',
-        title='Latest Inflation Rates by Country and Product Category'
-    )
-    fig1.update_layout(height=600)
+    fig1 = build_category_heatmap(pivot_data)
     st.plotly_chart(fig1, use_container_width=True, key='tab1_heatmap_country_product')
     
     # Bar chart of average inflation by product category
-    category_avg = latest_data.groupby('product_name')['inflation_rate_yoy'].mean().reset_index()
-    category_avg = category_avg.sort_values('inflation_rate_yoy', ascending=False)
+    category_avg = compute_category_avg(latest_data)
     
-    fig2 = px.bar(
-        category_avg,
-        x='product_name',
-        y='inflation_rate_yoy',
-        title='Average Inflation Rate by Product Category',
-        labels={'product_name': 'Product Category', 'inflation_rate_yoy': 'Avg. Inflation Rate (%)'},
-        color='inflation_rate_yoy',
-        color_continuous_scale='RdYlGn_r'
-    )
+    fig2 = build_category_bar(category_avg)
     st.plotly_chart(fig2, use_container_width=True, key='tab1_bar_product_inflation')
 
 with tab2:
@@ -343,202 +569,54 @@ with tab2:
     st.subheader("Product Category Hierarchy")
     
     # Allow selection of a main category to explore
-    main_categories = product_hierarchy[product_hierarchy['product_code'].str.len() == 4]['product_name'].unique()
+    main_categories = list(main_category_index)
     selected_main_category = st.selectbox("Select Main Category to Explore", main_categories, key='tab2_main_category_select')
     
-    # Get the product code for the selected main category
-    main_category_code = product_hierarchy[
-        (product_hierarchy['product_name'] == selected_main_category) & 
-        (product_hierarchy['product_code'].str.len() == 4)
-    ]['product_code'].iloc[0]
-    
-    # Get all subcategories for this main category
-    subcategory_codes = product_hierarchy[
-        product_hierarchy['product_code'].str.startswith(main_category_code[:2]) & 
-        (product_hierarchy['product_code'].str.len() > 4)
-    ]['product_code'].tolist()
+    # Get the product code and subcategory codes for the selected main category
+    main_category_code, subcategory_codes = main_category_index[selected_main_category]
     
     # Filter data for the selected main category and its subcategories
-    hierarchy_data = filtered_data[
-        ((filtered_data['product_code'] == main_category_code) | 
-        (filtered_data['product_code'].isin(subcategory_codes))) &
-        (filtered_data['year'] >= selected_years[0]) &
-        (filtered_data['year'] <= selected_years[1])
-    ]
+    hierarchy_codes = [main_category_code, *subcategory_codes]
+    hierarchy_data = filtered_data[filtered_data['product_code'].isin(hierarchy_codes)]
     
-    # Get the latest data for each country and product
-    latest_date = filtered_data['date_key'].max()
-    latest_data = filtered_data[filtered_data['date_key'] == latest_date]
+    # Create a treemap of inflation rates by product hierarchy, from the latest rows already selected above
+    latest_hierarchy = latest_data[latest_data['product_code'].isin(hierarchy_codes)]
     
-    # Display metrics
-    st.subheader("Latest Inflation Metrics by Product Category")
+    fig3 = build_hierarchy_treemap(latest_hierarchy, selected_main_category)
+    st.plotly_chart(fig3, use_container_width=True, key='treemap_hierarchy')
     
-    # Create tabs for different visualizations
-    tab1, tab2, tab3 = st.tabs(["Category Comparison", "Hierarchy Analysis", "Time Trends"])
+    # Line chart showing inflation trends for the main category and subcategories
+    fig4 = build_hierarchy_trend(hierarchy_data, selected_main_category)
+    st.plotly_chart(fig4, use_container_width=True, key='sunburst_hierarchy')
+
+with tab3:
+    # Time series analysis
+    st.subheader("Inflation Time Trends")
     
-    with tab1:
-        # Heatmap of latest inflation rates by country and main product categories
-        pivot_data = latest_data.pivot_table(
-            values='inflation_rate_yoy',
-            index='country_name',
-            columns='product_name',
-            aggfunc='mean'
-        )
-        
-        fig1 = px.imshow(
-            pivot_data,
-            labels=dict(x="Product Category", y="Country", color="Inflation Rate (%)"),
-            x=pivot_data.columns,
-            y=pivot_data.index,
-            color_continuous_scale='RdYlGn_r',
-            title='Latest Inflation Rates by Country and Product Category'
-        )
-        fig1.update_layout(height=600)
-        st.plotly_chart(fig1, use_container_width=True, key='tab2_heatmap_country_product')
-        
-        # Bar chart of average inflation by product category
-        category_avg = latest_data.groupby('product_name')['inflation_rate_yoy'].mean().reset_index()
-        category_avg = category_avg.sort_values('inflation_rate_yoy', ascending=False)
-        
-        fig2 = px.bar(
-            category_avg,
-            x='product_name',
-            y='inflation_rate_yoy',
-            title='Average Inflation Rate by Product Category',
-            labels={'product_name': 'Product Category', 'inflation_rate_yoy': 'Avg. Inflation Rate (%)'},
-            color='inflation_rate_yoy',
-            color_continuous_scale='RdYlGn_r'
-        )
-        st.plotly_chart(fig2, use_container_width=True, key='tab2_bar_product_inflation')
+    # Select specific product categories to compare
+    all_products = sorted(filtered_data['product_name'].unique())
+    selected_products = st.multiselect("Select Product Categories to Compare", all_products, default=all_products[:5] if len(all_products) > 5 else all_products, key='tab3_product_multiselect')
     
-    with tab2:
-        # Hierarchical analysis
-        st.subheader("Product Category Hierarchy")
-        
-        # Allow selection of a main category to explore
-        main_categories = product_hierarchy[product_hierarchy['product_code'].str.len() == 4]['product_name'].unique()
-        selected_main_category = st.selectbox("Select Main Category to Explore", main_categories, key='tab3_main_category_select')
-        
-        # Get the product code for the selected main category
-        main_category_code = product_hierarchy[
-            (product_hierarchy['product_name'] == selected_main_category) & 
-            (product_hierarchy['product_code'].str.len() == 4)
-        ]['product_code'].iloc[0]
-        
-        # Get all subcategories for this main category
-        subcategory_codes = product_hierarchy[
-            product_hierarchy['product_code'].str.startswith(main_category_code[:2]) & 
-            (product_hierarchy['product_code'].str.len() > 4)
-        ]['product_code'].tolist()
-        
-        # Filter data for the selected main category and its subcategories
-        hierarchy_data = filtered_data[
-            ((filtered_data['product_code'] == main_category_code) | 
-            (filtered_data['product_code'].isin(subcategory_codes)))
-        ]
-        
-        # Create a treemap of inflation rates by product hierarchy
-        latest_hierarchy = hierarchy_data[hierarchy_data['date_key'] == latest_date]
-        
-        fig3 = px.treemap(
-            latest_hierarchy,
-            path=[px.Constant("All"), 'product_level', 'product_name'],
-            values='price_index',
-            color='inflation_rate_yoy',
-            color_continuous_scale='RdYlGn_r',
-            title=f'Hierarchical View of {selected_main_category} and Subcategories',
-            hover_data=['inflation_rate_yoy', 'price_index']
-        )
-        fig3.update_layout(height=600)
-        st.plotly_chart(fig3, use_container_width=True, key='treemap_hierarchy')
-        
-        # Line chart showing inflation trends for the main category and subcategories
-        fig4 = px.line(
-            hierarchy_data,
-            x='date_key',
-            y='inflation_rate_yoy',
-            color='product_name',
-            title=f'Inflation Trends for {selected_main_category} and Subcategories',
-            labels={'date_key': 'Date', 'inflation_rate_yoy': 'Inflation Rate (%)', 'product_name': 'Product Category'}
-        )
-        st.plotly_chart(fig4, use_container_width=True, key='sunburst_hierarchy')
+    # Filter for selected products
+    product_data = filtered_data[filtered_data['product_name'].isin(selected_products)]
     
-    with tab3:
-        # Time series analysis
-        st.subheader("Inflation Time Trends")
-        
-        # Select specific product categories to compare
-        all_products = sorted(filtered_data['product_name'].unique())
-        selected_products = st.multiselect("Select Product Categories to Compare", all_products, default=all_products[:5] if len(all_products) > 5 else all_products, key='tab3_product_multiselect')
-        
-        # Filter for selected products
-        product_data = filtered_data[filtered_data['product_name'].isin(selected_products)]
-        
-        # Create a line chart of inflation rates over time by product category
-        fig5 = px.line(
-            product_data,
-            x='date_key',
-            y='inflation_rate_yoy',
-            color='product_name',
-            facet_col='country_name',
-            facet_col_wrap=2,
-            title='Inflation Rate Trends by Product Category and Country',
-            labels={'date_key': 'Date', 'inflation_rate_yoy': 'Inflation Rate (%)', 'product_name': 'Product Category'}
-        )
-        fig5.update_layout(height=800)
-        st.plotly_chart(fig5, use_container_width=True, key='line_product_time')
-        
-        # Heatmap of inflation rates over time
-        # Aggregate by year and product
-        yearly_data = product_data.groupby(['year', 'product_name'])['inflation_rate_yoy'].mean().reset_index()
-        pivot_yearly = yearly_data.pivot_table(
-            values='inflation_rate_yoy',
-            index='product_name',
-            columns='year',
-            aggfunc='mean'
-        )
-        
-        fig6 = px.imshow(
-            pivot_yearly,
-            labels=dict(x="Year", y="Product Category", color="Inflation Rate (%)"),
-            x=pivot_yearly.columns,
-            y=pivot_yearly.index,
-            color_continuous_scale='RdYlGn_r',
-            title='Inflation Rate Heatmap by Product Category and Year'
-        )
-        st.plotly_chart(fig6, use_container_width=True, key='heatmap_product_year')
+    # Create a line chart of inflation rates over time by product category
+    fig5 = build_product_trend(product_data)
+    st.plotly_chart(fig5, use_container_width=True, key='line_product_time')
     
-    # Data table
-    st.subheader("Detailed Inflation Data")
-    st.dataframe(
-        filtered_data[[
-            'country_name', 'product_code', 'product_name', 'product_level',
-            'parent_product_code', 'date_key', 'inflation_rate_yoy', 'price_index'
-        ]].sort_values(['country_name', 'product_code', 'date_key']),
-        use_container_width=True
-    )
+    # Heatmap of inflation rates over time
+    pivot_yearly = compute_yearly_pivot(product_data)
+    
+    fig6 = build_yearly_heatmap(pivot_yearly)
+    st.plotly_chart(fig6, use_container_width=True, key='heatmap_product_year')
 
-# Sample inflation data
-inflation_data = pd.DataFrame({
-    'country_code': ['DE', 'FR', 'ES', 'IT', 'DE', 'FR', 'ES', 'IT'] * 50,
-    'country_name': ['Germany', 'France', 'Spain', 'Italy', 'Germany', 'France', 'Spain', 'Italy'] * 50,
-    'product_code': ['CP00', 'CP01', 'CP02', 'CP03', 'CP04', 'CP05', 'CP06', 'CP07'] * 50,
-    'product_name': ['All Items', 'Food and Beverages', 'Clothing', 'Housing', 'Furniture', 'Health', 'Transport', 'Communication'] * 50,
-    'date_key': pd.date_range(start='2020-01-01', periods=400, freq='M').tolist(),
-    'year': [d.year for d in pd.date_range(start='2020-01-01', periods=400, freq='M')] * 1,
-    'month': [d.month for d in pd.date_range(start='2020-01-01', periods=400, freq='M')] * 1,
-    'inflation_rate_yoy': [2.1, 3.2, 1.5, 4.3, 2.8, 1.9, 3.7, 2.5] * 50 + [x/10 for x in range(-20, 60, 10)] * 50,
-    'inflation_rate_mom': [0.2, 0.3, 0.1, 0.4, 0.3, 0.2, 0.4, 0.3] * 50,
-    'price_index': [105, 110, 103, 115, 108, 104, 112, 106] * 50,
-    'product_level': [1, 1, 1, 1, 2, 2, 2, 2] * 50,
-    'parent_product_code': [None, None, None, None, 'CP00', 'CP00', 'CP00', 'CP00'] * 50
-})
-
-# Sample product hierarchy
-product_hierarchy = pd.DataFrame({
-    'product_code': ['CP00', 'CP01', 'CP02', 'CP03', 'CP04', 'CP05', 'CP06', 'CP07'],
-    'product_name': ['All Items', 'Food and Beverages', 'Clothing', 'Housing', 'Furniture', 'Health', 'Transport', 'Communication'],
-    'category_description': ['All COICOP categories', 'Food, beverages and tobacco', 'Clothing and footwear', 'Housing, water, electricity, gas and other fuels', 
-                           'Furniture, household equipment and maintenance', 'Health', 'Transport', 'Communications'],
-    'main_category': ['Overall', 'Food', 'Clothing', 'Housing', 'Household', 'Health', 'Transport', 'Communication']
-})
+# Data table
+st.subheader("Detailed Inflation Data")
+st.dataframe(
+    filtered_data[[
+        'country_name', 'product_code', 'product_name', 'product_level',
+        'parent_product_code', 'date_key', 'inflation_rate_yoy', 'price_index'
+    ]].sort_values(['country_name', 'product_code', 'date_key']),
+    column_config={'date_key': st.column_config.DateColumn('date_key', format='YYYY-MM-DD')},
+    use_container_width=True
+)
@@ -1,11 +1,12 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 import plotly.express as px
-import plotly.graph_objects as go
 import snowflake.connector
 import os
 from dotenv import load_dotenv
+from utils.sample_cache import sample_path, read_sample, save_sample
 
 # Load environment variables
 load_dotenv()
@@ -28,8 +29,9 @@ This dashboard analyzes product-level pricing data from Open Food Facts in relat
 Explore how actual product prices compare to what would be expected based on inflation rates.
 """)
 
-# Connect to Snowflake
-@st.cache_data(ttl=3600)
+# Connect to Snowflake; the connection is a shared resource (it can't be pickled for st.cache_data),
+# reopened if it has been closed
+@st.cache_resource(ttl=3600, validate=lambda conn: conn is None or not conn.is_closed())
 def get_snowflake_connection():
     try:
         return snowflake.connector.connect(
@@ -44,6 +46,184 @@ def get_snowflake_connection():
         st.warning(f"Could not connect to Snowflake: {e}")
         return None
 
+# Read a query result through the connector's Arrow path instead of building DB-API row tuples
+def fetch_frame(conn, query, params=None):
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        df = cur.fetch_pandas_all()
+    # Unquoted Snowflake identifiers come back upper-case
+    df.columns = df.columns.str.lower()
+    return df
+
+# Same as fetch_frame for the full fact table, but keeps the string columns Arrow-backed
+# rather than converting them to Python object arrays
+def fetch_arrow_frame(conn, query):
+    with conn.cursor() as cur:
+        cur.execute(query)
+        columns = [col[0].lower() for col in cur.description]
+        batches = list(cur.fetch_arrow_batches())
+    if not batches:
+        return pd.DataFrame(columns=columns)
+    df = pa.concat_tables(batches).to_pandas(types_mapper={pa.string(): pd.ArrowDtype(pa.string())}.get)
+    df.columns = columns
+    return df
+
+# Distinct filter values and the date span, so the sidebar can be built without downloading the fact table
+@st.cache_data(ttl=3600)
+def load_filter_options():
+    try:
+        conn = get_snowflake_connection()
+        if conn is None:
+            # get_snowflake_connection has already reported why
+            return None
+        
+        countries = fetch_frame(conn, "SELECT DISTINCT country_name FROM FACT_PRODUCT_PRICES")
+        categories = fetch_frame(conn, "SELECT DISTINCT food_category FROM FACT_PRODUCT_PRICES")
+        brands = fetch_frame(conn, "SELECT DISTINCT brand FROM FACT_PRODUCT_PRICES WHERE brand IS NOT NULL")
+        date_span = fetch_frame(conn, "SELECT MIN(date_key) AS min_date, MAX(date_key) AS max_date FROM FACT_PRODUCT_PRICES")
+        return {
+            'countries': sorted(countries['country_name']),
+            'categories': sorted(categories['food_category']),
+            'brands': sorted(brands['brand']),
+            'min_date': pd.Timestamp(date_span['min_date'].iloc[0]).date(),
+            'max_date': pd.Timestamp(date_span['max_date'].iloc[0]).date()
+        }
+    except Exception as e:
+        st.warning(f"Could not load the filter options from Snowflake: {e}")
+        return None
+
+# Only the columns the filters, charts and table use; the identifiers, nutrition grades and
+# GDP figures are never read on this page
+PRICE_COLUMNS = [
+    'product_name', 'brand', 'country_name', 'food_category',
+    'price_value', 'price_currency', 'price_per_standard_unit', 'standard_unit',
+    'category_inflation_rate', 'overall_inflation_rate', 'price_deviation_from_inflation',
+    'date_key', 'year', 'month'
+]
+
+# Keep the used columns, store the repeated labels as categoricals so the isin filters and
+# groupbys below work on integer codes instead of Python strings, downcast the measures, and
+# parse date_key once inside the cached loaders
+def prepare_prices(df):
+    df = df[PRICE_COLUMNS].astype({
+        **{col: 'category' for col in
+           ['country_name', 'food_category', 'brand', 'standard_unit', 'price_currency']},
+        **{col: 'float32' for col in
+           ['price_value', 'price_per_standard_unit', 'category_inflation_rate',
+            'overall_inflation_rate', 'price_deviation_from_inflation']},
+        'year': 'int16',
+        'month': 'int8'
+    })
+    df['date_key'] = pd.to_datetime(df['date_key'])
+    return df
+
+# Most points drawn in the price vs. inflation scatter, sampled per food category
+SCATTER_MAX_POINTS = 2000
+# Rows shown in the product data table, highest price per unit first
+TABLE_MAX_ROWS = 5000
+
+# Metrics, chart aggregates and table rows for one filter selection, grouped and averaged in Snowflake
+# so only the small result sets are transferred
+@st.cache_data(ttl=3600)
+def load_price_summaries(countries, categories, brands, start_date, end_date):
+    try:
+        conn = get_snowflake_connection()
+        if conn is None:
+            raise Exception("Could not establish Snowflake connection")
+        
+        # An empty selection becomes IN (NULL), which matches no rows; no brand selection means all brands
+        country_placeholders = ', '.join(['%s'] * len(countries)) or 'NULL'
+        category_placeholders = ', '.join(['%s'] * len(categories)) or 'NULL'
+        brand_filter = f"AND p.brand IN ({', '.join(['%s'] * len(brands))})" if brands else ""
+        where = f"""
+        WHERE
+            p.country_name IN ({country_placeholders})
+            AND p.food_category IN ({category_placeholders})
+            {brand_filter}
+            AND p.date_key BETWEEN %s AND %s
+        """
+        params = (*countries, *categories, *brands, start_date, end_date)
+        
+        metrics = fetch_frame(conn, f"""
+        SELECT
+            AVG(p.price_per_standard_unit) AS price_per_standard_unit,
+            AVG(p.category_inflation_rate) AS category_inflation_rate,
+            AVG(p.overall_inflation_rate) AS overall_inflation_rate,
+            AVG(p.price_deviation_from_inflation) AS price_deviation_from_inflation
+        FROM 
+            FACT_PRODUCT_PRICES p
+        {where}
+        """, params)
+        category_price_data = fetch_frame(conn, f"""
+        SELECT
+            p.food_category,
+            AVG(p.price_per_standard_unit) AS price_per_standard_unit
+        FROM 
+            FACT_PRODUCT_PRICES p
+        {where}
+        GROUP BY
+            p.food_category
+        ORDER BY
+            price_per_standard_unit DESC
+        """, params)
+        time_data = fetch_frame(conn, f"""
+        SELECT
+            p.year,
+            p.month,
+            p.country_name,
+            AVG(p.price_per_standard_unit) AS price_per_standard_unit,
+            AVG(p.category_inflation_rate) AS category_inflation_rate,
+            AVG(p.overall_inflation_rate) AS overall_inflation_rate
+        FROM 
+            FACT_PRODUCT_PRICES p
+        {where}
+        GROUP BY
+            p.year, p.month, p.country_name
+        ORDER BY
+            p.year, p.month, p.country_name
+        """, params)
+        scatter_data = fetch_frame(conn, f"""
+        SELECT
+            p.product_name,
+            p.brand,
+            p.country_name,
+            p.food_category,
+            p.date_key,
+            p.price_value,
+            p.price_per_standard_unit,
+            p.category_inflation_rate
+        FROM 
+            FACT_PRODUCT_PRICES p
+        {where}
+        QUALIFY
+            ROW_NUMBER() OVER (PARTITION BY p.food_category ORDER BY RANDOM())
+                <= GREATEST(1, FLOOR({SCATTER_MAX_POINTS} * COUNT(*) OVER (PARTITION BY p.food_category) / COUNT(*) OVER ()))
+        """, params)
+        table_data = fetch_frame(conn, f"""
+        SELECT
+            p.product_name,
+            p.brand,
+            p.country_name,
+            p.food_category,
+            p.price_value,
+            p.price_currency,
+            p.price_per_standard_unit,
+            p.standard_unit,
+            p.category_inflation_rate,
+            p.overall_inflation_rate,
+            p.date_key
+        FROM 
+            FACT_PRODUCT_PRICES p
+        {where}
+        ORDER BY
+            p.price_per_standard_unit DESC
+        LIMIT {TABLE_MAX_ROWS}
+        """, params)
+        return metrics.iloc[0], category_price_data, time_data, scatter_data, table_data
+    except Exception as e:
+        st.warning(f"Could not summarise product prices in Snowflake: {e}")
+        return None
+
 # Function to load data
 @st.cache_data(ttl=3600)
 def load_product_price_data():
@@ -53,36 +233,34 @@ def load_product_price_data():
             raise Exception("Could not establish Snowflake connection")
         query = """
         SELECT 
-            p.record_id,
-            p.product_id,
             p.product_name,
             p.brand,
-            p.country_code,
             p.country_name,
             p.food_category,
             p.price_value,
             p.price_currency,
             p.price_per_standard_unit,
             p.standard_unit,
-            p.date_key,
-            p.year,
-            p.month,
-            p.nutrition_grade,
             p.category_inflation_rate,
             p.overall_inflation_rate,
-            p.gdp_per_capita,
-            p.gdp_growth_rate,
-            p.price_deviation_from_inflation
+            p.price_deviation_from_inflation,
+            p.date_key,
+            p.year,
+            p.month
         FROM 
             FACT_PRODUCT_PRICES p
         """
-        df = pd.read_sql(query, conn)
-        conn.close()
-        return df
+        df = fetch_arrow_frame(conn, query)
+        return prepare_prices(df)
     except Exception as e:
         st.warning(f"Could not connect to Snowflake: {e}")
         st.info("Loading sample product price data for demonstration purposes...")
         
+        path = sample_path('product_prices', __file__)
+        cached = read_sample(path, PRICE_COLUMNS)
+        if cached is not None:
+            return cached
+        
         # Create sample data for demonstration
         # Define countries and food categories
         countries = ['Germany', 'France', 'Spain', 'Italy', 'Netherlands', 'Belgium', 'Austria', 'Portugal']
@@ -103,12 +281,12 @@ def load_product_price_data():
         
         # Generate dates from 2020-01 to 2023-12
         dates = pd.date_range(start='2020-01-01', end='2023-12-01', freq='MS')
-        years = [d.year for d in dates]
-        months = [d.month for d in dates]
-        date_keys = [d.strftime('%Y-%m-%d') for d in dates]
+        years = dates.year.to_numpy()
+        months = dates.month.to_numpy()
+        date_keys = dates.strftime('%Y-%m-%d').to_numpy()
         
         # Create sample product data
-        np.random.seed(42)  # For reproducibility
+        rng = np.random.default_rng(42)  # For reproducibility
         
         # Create product names based on food categories
         product_templates = {
@@ -158,126 +336,130 @@ def load_product_price_data():
             'Condiments and sauces': 5.0
         }
         
-        # Create sample data with realistic price patterns
-        data = []
-        record_id = 10000
-        product_id = 1000
-        
-        for country_idx, country in enumerate(countries):
-            # Country-specific price factor (some countries are more expensive)
-            country_factor = 1.0 + (country_idx % 3) * 0.1
-            
-            for category in food_categories:
-                # Get base price for this category
-                category_base_price = base_prices[category]
-                standard_unit = standard_units[category]
-                
-                # Create 5 products per category per country
-                for product_idx in range(5):
-                    product_id += 1
-                    product_type = product_templates[category][product_idx]
-                    product_name = f"{product_type} {product_idx+1}"
-                    brand = brands[np.random.randint(0, len(brands))]
-                    
-                    # Product-specific price factor
-                    product_factor = 0.9 + (product_idx * 0.05) + np.random.random() * 0.2
-                    
-                    for date_idx, date in enumerate(dates):
-                        record_id += 1
-                        
-                        # Time-based inflation effects
-                        time_factor = 1.0
-                        if date.year == 2021 and date.month >= 6:
-                            # Price increase in mid-2021
-                            time_factor = 1.03
-                        elif date.year == 2022:
-                            # Higher prices in 2022 (inflation peak)
-                            time_factor = 1.08
-                            # Energy crisis affected food prices
-                            if category in ['Dairy products', 'Meat products', 'Prepared meals']:
-                                time_factor *= 1.04
-                        elif date.year == 2023 and date.month <= 6:
-                            # Gradually decreasing in 2023
-                            time_factor = 1.06 - (date.month * 0.002)
-                        elif date.year == 2023 and date.month > 6:
-                            # Further stabilization in late 2023
-                            time_factor = 1.05 - ((date.month - 6) * 0.001)
-                        
-                        # Calculate price with all factors
-                        base_price = category_base_price * country_factor * product_factor * time_factor
-                        
-                        # Add some randomness to price
-                        price_value = base_price * (0.98 + np.random.random() * 0.04)
-                        price_per_standard_unit = price_value
-                        
-                        # Calculate inflation rates
-                        # Overall inflation rate pattern
-                        if date.year == 2020:
-                            overall_inflation = 1.5 + (np.random.random() - 0.5)
-                        elif date.year == 2021 and date.month < 6:
-                            overall_inflation = 2.0 + (np.random.random() - 0.5)
-                        elif date.year == 2021 and date.month >= 6:
-                            overall_inflation = 3.0 + (np.random.random() - 0.5)
-                        elif date.year == 2022 and date.month < 6:
-                            overall_inflation = 5.0 + (np.random.random() - 0.5)
-                        elif date.year == 2022 and date.month >= 6:
-                            overall_inflation = 8.0 + (np.random.random() - 0.5)
-                        elif date.year == 2023 and date.month < 6:
-                            overall_inflation = 6.5 + (np.random.random() - 0.5)
-                        else:
-                            overall_inflation = 4.0 + (np.random.random() - 0.5)
-                        
-                        # Category-specific inflation (some categories inflate more than others)
-                        category_factor = 1.0
-                        if category in ['Dairy products', 'Meat products']:
-                            category_factor = 1.2
-                        elif category in ['Fruits', 'Vegetables']:
-                            category_factor = 1.3
-                        elif category in ['Beverages']:
-                            category_factor = 0.8
-                        
-                        category_inflation = overall_inflation * category_factor
-                        
-                        # GDP data
-                        gdp_per_capita = 30000 + (country_idx * 5000) + (date.year - 2020) * 1000
-                        gdp_growth_rate = 1.5 + (date.year - 2020) * 0.5 + (np.random.random() - 0.5)
-                        if date.year == 2020:  # COVID impact
-                            gdp_growth_rate = -3.0 + (np.random.random() * 2)
-                        
-                        # Price deviation from inflation
-                        expected_price_increase = overall_inflation / 100
-                        actual_price_increase = (time_factor - 1)
-                        price_deviation = actual_price_increase - expected_price_increase
-                        
-                        # Nutrition grade (A-E)
-                        nutrition_grades = ['A', 'B', 'C', 'D', 'E']
-                        nutrition_weights = [0.2, 0.3, 0.3, 0.15, 0.05]  # Most products are B or C
-                        nutrition_grade = np.random.choice(nutrition_grades, p=nutrition_weights)
-                        
-                        data.append({
-                            'record_id': record_id,
-                            'product_id': product_id,
-                            'product_name': f"{brand} {product_name}",
-                            'brand': brand,
-                            'country_code': country_codes[country_idx],
-                            'country_name': country,
-                            'food_category': category,
-                            'price_value': round(price_value, 2),
-                            'price_currency': 'EUR',
-                            'price_per_standard_unit': round(price_per_standard_unit, 2),
-                            'standard_unit': standard_unit,
-                            'date_key': date_keys[date_idx],
-                            'year': years[date_idx],
-                            'month': months[date_idx],
-                            'nutrition_grade': nutrition_grade,
-                            'category_inflation_rate': round(category_inflation, 2),
-                            'overall_inflation_rate': round(overall_inflation, 2),
-                            'gdp_per_capita': gdp_per_capita,
-                            'gdp_growth_rate': round(gdp_growth_rate, 2),
-                            'price_deviation_from_inflation': round(price_deviation * 100, 2)
-                        })
-        
-        return pd.DataFrame(data)
+        # Flat (country, category, product) indices, one entry per product, and the matching
+        # per-row indices over all dates
+        n_countries, n_categories, n_dates = len(countries), len(food_categories), len(dates)
+        products_per_category = 5
+        n_products = n_countries * n_categories * products_per_category
+        product_ci = np.repeat(np.arange(n_countries), n_categories * products_per_category)
+        product_ki = np.tile(np.repeat(np.arange(n_categories), products_per_category), n_countries)
+        product_pi = np.tile(np.arange(products_per_category), n_countries * n_categories)
+        
+        pi = np.repeat(np.arange(n_products), n_dates)
+        di = np.tile(np.arange(n_dates), n_products)
+        ci, ki = product_ci[pi], product_ki[pi]
+        n_rows = len(pi)
+        
+        # Each product gets a brand and a product-specific price factor
+        brand_idx = rng.integers(0, len(brands), size=n_products)
+        product_factor = 0.9 + (product_pi * 0.05) + rng.random(n_products) * 0.2
+        brand_names = np.array(brands)[brand_idx]
+        product_types = np.array([product_templates[category][idx] for category in food_categories
+                                  for idx in range(products_per_category)])
+        product_names = (
+            pd.Series(brand_names) + ' ' + product_types[product_ki * products_per_category + product_pi]
+            + ' ' + (product_pi + 1).astype(str)
+        ).to_numpy()
+        
+        # Category lookups
+        category_base_price = np.array([base_prices[category] for category in food_categories])
+        category_units = np.array([standard_units[category] for category in food_categories])
+        energy_affected = np.isin(food_categories, ['Dairy products', 'Meat products', 'Prepared meals'])
+        # Category-specific inflation (some categories inflate more than others)
+        category_factor = np.select(
+            [
+                np.isin(food_categories, ['Dairy products', 'Meat products']),
+                np.isin(food_categories, ['Fruits', 'Vegetables']),
+                np.isin(food_categories, ['Beverages'])
+            ],
+            [1.2, 1.3, 0.8],
+            default=1.0
+        )
+        
+        year, month = years[di], months[di]
+        
+        # Country-specific price factor (some countries are more expensive)
+        country_factor = 1.0 + (ci % 3) * 0.1
+        
+        # Time-based inflation effects
+        time_factor = np.select(
+            [
+                (year == 2021) & (month >= 6),   # Price increase in mid-2021
+                year == 2022,                    # Higher prices in 2022 (inflation peak)
+                (year == 2023) & (month <= 6),   # Gradually decreasing in 2023
+                (year == 2023) & (month > 6)     # Further stabilization in late 2023
+            ],
+            [
+                1.03,
+                1.08,
+                1.06 - (month * 0.002),
+                1.05 - ((month - 6) * 0.001)
+            ],
+            default=1.0
+        )
+        # Energy crisis affected food prices
+        time_factor = np.where((year == 2022) & energy_affected[ki], time_factor * 1.04, time_factor)
+        
+        # All per-row randomness in one draw: price noise, inflation noise and GDP growth noise
+        noise = rng.random((n_rows, 3))
+        
+        # Calculate price with all factors, adding some randomness
+        base_price = category_base_price[ki] * country_factor * product_factor[pi] * time_factor
+        price_value = base_price * (0.98 + noise[:, 0] * 0.04)
+        
+        # Overall inflation rate pattern
+        overall_inflation = np.select(
+            [
+                year == 2020,
+                (year == 2021) & (month < 6),
+                (year == 2021) & (month >= 6),
+                (year == 2022) & (month < 6),
+                (year == 2022) & (month >= 6),
+                (year == 2023) & (month < 6)
+            ],
+            [1.5, 2.0, 3.0, 5.0, 8.0, 6.5],
+            default=4.0
+        ) + (noise[:, 1] - 0.5)
+        category_inflation = overall_inflation * category_factor[ki]
+        
+        # GDP data, with the COVID impact in 2020
+        gdp_per_capita = 30000 + (ci * 5000) + (year - 2020) * 1000
+        gdp_growth_rate = np.where(
+            year == 2020,
+            -3.0 + (noise[:, 2] * 2),
+            1.5 + (year - 2020) * 0.5 + (noise[:, 2] - 0.5)
+        )
+        
+        # Price deviation from inflation
+        price_deviation = (time_factor - 1) - overall_inflation / 100
+        
+        # Nutrition grade (A-E), most products are B or C
+        nutrition_grade = rng.choice(['A', 'B', 'C', 'D', 'E'], size=n_rows, p=[0.2, 0.3, 0.3, 0.15, 0.05])
+        
+        data = pd.DataFrame({
+            'record_id': np.arange(10001, 10001 + n_rows),
+            'product_id': 1001 + pi,
+            'product_name': product_names[pi],
+            'brand': brand_names[pi],
+            'country_code': np.array(country_codes)[ci],
+            'country_name': np.array(countries)[ci],
+            'food_category': np.array(food_categories)[ki],
+            'price_value': price_value.round(2),
+            'price_currency': 'EUR',
+            'price_per_standard_unit': price_value.round(2),
+            'standard_unit': category_units[ki],
+            'date_key': date_keys[di],
+            'year': year,
+            'month': month,
+            'nutrition_grade': nutrition_grade,
+            'category_inflation_rate': category_inflation.round(2),
+            'overall_inflation_rate': overall_inflation.round(2),
+            'gdp_per_capita': gdp_per_capita,
+            'gdp_growth_rate': gdp_growth_rate.round(2),
+            'price_deviation_from_inflation': (price_deviation * 100).round(2)
+        })
+        
+        return save_sample(prepare_prices(data), path)
 
 # Function to load inflation data for comparison
 @st.cache_data(ttl=3600)
@@ -299,22 +481,27 @@ def load_inflation_data():
         WHERE
             i.product_code IN ('CP00', 'CP01')
         """
-        df = pd.read_sql(query, conn)
-        conn.close()
+        df = fetch_frame(conn, query)
+        df['date_key'] = pd.to_datetime(df['date_key'])
         return df
     except Exception as e:
         st.warning(f"Could not connect to Snowflake: {e}")
         st.info("Loading sample inflation data for comparison...")
         
+        path = sample_path('price_inflation', __file__)
+        cached = read_sample(path, ['country_code', 'country_name', 'product_code', 'product_name', 'date_key', 'year', 'month', 'inflation_rate_yoy'])
+        if cached is not None:
+            return cached
+        
         # Create sample inflation data that matches the countries in product_price_data
         countries = ['Germany', 'France', 'Spain', 'Italy', 'Netherlands', 'Belgium', 'Austria', 'Portugal']
         country_codes = ['DE', 'FR', 'ES', 'IT', 'NL', 'BE', 'AT', 'PT']
         
         # Generate dates from 2020-01 to 2023-12
         dates = pd.date_range(start='2020-01-01', end='2023-12-01', freq='MS')
-        years = [d.year for d in dates]
-        months = [d.month for d in dates]
-        date_keys = [d.strftime('%Y-%m-%d') for d in dates]
+        years = dates.year.to_numpy()
+        months = dates.month.to_numpy()
+        date_keys = dates.strftime('%Y-%m-%d').to_numpy()
         
         # Product codes and names for inflation data
         products = [
@@ -322,76 +509,218 @@ def load_inflation_data():
             {'code': 'CP01', 'name': 'Food and Non-Alcoholic Beverages'}
         ]
         
-        # Create sample data with realistic inflation patterns
-        data = []
-        for i, country in enumerate(countries):
-            for product in products:
-                for j, date in enumerate(dates):
-                    # Create realistic inflation patterns with some randomness and trends
-                    base_inflation = 2.0  # Starting inflation rate
-                    
-                    # Food inflation is typically higher than overall inflation
-                    product_factor = 1.0 if product['code'] == 'CP00' else 1.3
-                    
-                    # Create realistic inflation patterns with some randomness and trends
-                    if date.year == 2021 and date.month >= 6:
-                        # Inflation spike in mid-2021
-                        base_inflation = 3.5 * product_factor + (i % 3) * 0.3
-                    elif date.year == 2022:
-                        # Higher inflation in 2022
-                        base_inflation = 5.0 * product_factor + (i % 4) * 0.4
-                        # Food prices also spiked
-                        if product['code'] == 'CP01':
-                            base_inflation *= 1.2
-                    elif date.year == 2023 and date.month <= 6:
-                        # Gradually decreasing in 2023
-                        base_inflation = 4.0 * product_factor - (date.month * 0.1) + (i % 3) * 0.2
-                    elif date.year == 2023 and date.month > 6:
-                        # Further decrease in late 2023
-                        base_inflation = 2.5 * product_factor - ((date.month - 6) * 0.1) + (i % 2) * 0.2
-                    
-                    # Add some randomness
-                    inflation_rate_yoy = base_inflation + (np.random.random() - 0.5) * 0.8
-                    
-                    data.append({
-                        'country_code': country_codes[i],
-                        'country_name': country,
-                        'product_code': product['code'],
-                        'product_name': product['name'],
-                        'date_key': date_keys[j],
-                        'year': years[j],
-                        'month': months[j],
-                        'inflation_rate_yoy': round(inflation_rate_yoy, 2)
-                    })
-        
-        return pd.DataFrame(data)
-
-# Load data
-product_data = load_product_price_data()
-inflation_data = load_inflation_data()
+        # Flat (country, product, date) indices over the full Cartesian product, one entry per row
+        n_countries, n_products, n_dates = len(countries), len(products), len(dates)
+        ci = np.repeat(np.arange(n_countries), n_products * n_dates)
+        pi = np.tile(np.repeat(np.arange(n_products), n_dates), n_countries)
+        di = np.tile(np.arange(n_dates), n_countries * n_products)
+        year, month = years[di], months[di]
+        
+        # Food inflation is typically higher than overall inflation
+        product_codes = np.array([product['code'] for product in products])
+        is_food = product_codes[pi] == 'CP01'
+        product_factor = np.where(is_food, 1.3, 1.0)
+        
+        # Create realistic inflation patterns with some randomness and trends
+        base_inflation = np.select(
+            [
+                (year == 2021) & (month >= 6),
+                year == 2022,
+                (year == 2023) & (month <= 6),
+                (year == 2023) & (month > 6)
+            ],
+            [
+                3.5 * product_factor + (ci % 3) * 0.3,                                   # Inflation spike in mid-2021
+                (5.0 * product_factor + (ci % 4) * 0.4) * np.where(is_food, 1.2, 1.0),   # Higher inflation in 2022, food prices also spiked
+                4.0 * product_factor - (month * 0.1) + (ci % 3) * 0.2,                   # Gradually decreasing in 2023
+                2.5 * product_factor - ((month - 6) * 0.1) + (ci % 2) * 0.2              # Further decrease in late 2023
+            ],
+            default=2.0  # Starting inflation rate
+        )
+        
+        # Add some randomness, drawn for every row at once from a seeded generator
+        inflation_rate_yoy = base_inflation + (np.random.default_rng(42).random(len(ci)) - 0.5) * 0.8
+        
+        df = pd.DataFrame({
+            'country_code': np.array(country_codes)[ci],
+            'country_name': np.array(countries)[ci],
+            'product_code': product_codes[pi],
+            'product_name': np.array([product['name'] for product in products])[pi],
+            'date_key': date_keys[di],
+            'year': year,
+            'month': month,
+            'inflation_rate_yoy': inflation_rate_yoy.round(2)
+        })
+        df['date_key'] = pd.to_datetime(df['date_key'])
+        return save_sample(df, path)
+
+# Same selection as load_price_summaries, applied to already loaded rows. Cached per selection only:
+# the leading underscore keeps Streamlit from hashing the whole frame on every rerun, which is safe
+# because it is always the frame cached by load_product_price_data
+@st.cache_data(ttl=3600, max_entries=32)
+def filter_prices(_product_data, countries, categories, brands, start_date, end_date):
+    date_values = _product_data['date_key'].to_numpy()
+    masks = [
+        np.isin(_product_data['country_name'].cat.codes.to_numpy(),
+                _product_data['country_name'].cat.categories.get_indexer(list(countries))),
+        np.isin(_product_data['food_category'].cat.codes.to_numpy(),
+                _product_data['food_category'].cat.categories.get_indexer(list(categories))),
+        date_values >= start_date.to_datetime64(),
+        date_values <= end_date.to_datetime64()
+    ]
+    if brands:
+        masks.append(np.isin(_product_data['brand'].cat.codes.to_numpy(),
+                             _product_data['brand'].cat.categories.get_indexer(list(brands))))
+    return _product_data[np.logical_and.reduce(masks)]
+
+# Same results as load_price_summaries, computed in pandas from the filtered rows
+@st.cache_data(ttl=3600, max_entries=32)
+def summarize_prices(filtered_data):
+    # All four metric means in one pass
+    metrics = filtered_data.agg({
+        'price_per_standard_unit': 'mean',
+        'category_inflation_rate': 'mean',
+        'overall_inflation_rate': 'mean',
+        'price_deviation_from_inflation': 'mean'
+    })
+    
+    # Average price by food category; the group order doesn't matter since the result is sorted by price
+    category_price_data = filtered_data.groupby('food_category', observed=True, sort=False)['price_per_standard_unit'].mean().reset_index()
+    category_price_data = category_price_data.sort_values('price_per_standard_unit', ascending=False)
+    
+    # Aggregate by month and country
+    time_data = filtered_data.groupby(['year', 'month', 'country_name'], observed=True)[
+        ['price_per_standard_unit', 'category_inflation_rate', 'overall_inflation_rate']
+    ].mean().reset_index()
+    
+    # Partial sort: only the top rows are shown
+    table_data = filtered_data.nlargest(TABLE_MAX_ROWS, 'price_per_standard_unit')[[
+        'product_name', 'brand', 'country_name', 'food_category',
+        'price_value', 'price_currency', 'price_per_standard_unit', 'standard_unit',
+        'category_inflation_rate', 'overall_inflation_rate', 'date_key'
+    ]]
+    # Stratified sample for the scatter, so every food category keeps its share of the points;
+    # same quotas as the QUALIFY clause in load_price_summaries
+    scatter_data = filtered_data
+    if len(filtered_data) > SCATTER_MAX_POINTS:
+        shuffled = filtered_data.sample(frac=1, random_state=0)
+        by_category = shuffled.groupby('food_category', observed=True)
+        quota = np.maximum(1, np.floor(SCATTER_MAX_POINTS * by_category['food_category'].transform('size') / len(shuffled)))
+        scatter_data = shuffled[by_category.cumcount() < quota].sort_index()
+    return metrics, category_price_data, time_data, scatter_data, table_data
+
+# Figures are cached on their (small, aggregated) inputs so tab switches and unrelated widget changes
+# reuse the built figure instead of rerunning Plotly Express
+# The figures set uirevision so zoom and legend state survive reruns; the mode bar isn't needed here
+PLOTLY_CONFIG = {'displayModeBar': False}
+
+@st.cache_data(ttl=3600, max_entries=32)
+def build_category_bar(category_price_data):
+    fig = px.bar(
+        category_price_data,
+        x='food_category',
+        y='price_per_standard_unit',
+        title='Average Price per Standard Unit by Food Category',
+        labels={'food_category': 'Food Category', 'price_per_standard_unit': 'Avg. Price per Unit'},
+        color='food_category'
+    )
+    fig.update_layout(uirevision='static')
+    return fig
+
+@st.cache_data(ttl=3600, max_entries=32)
+def build_price_scatter(scatter_data):
+    # Size markers by five price buckets rather than the continuous price, so Plotly only has to
+    # scale a small integer column (pd.cut can't bin an empty selection)
+    if len(scatter_data):
+        scatter_data = scatter_data.assign(price_size=pd.cut(scatter_data['price_value'], bins=5, labels=False) + 1)
+    else:
+        scatter_data = scatter_data.assign(price_size=scatter_data['price_value'])
+    fig = px.scatter(
+        scatter_data,
+        x='category_inflation_rate',
+        y='price_per_standard_unit',
+        color='food_category',
+        size='price_size',
+        hover_name='product_name',
+        hover_data={'brand': True, 'country_name': True, 'date_key': True, 'price_value': ':.2f', 'price_size': False},
+        render_mode='webgl',
+        title='Product Price vs. Category Inflation Rate',
+        labels={
+            'category_inflation_rate': 'Category Inflation Rate (%)',
+            'price_per_standard_unit': 'Price per Standard Unit',
+            'food_category': 'Food Category',
+            'price_value': 'Price'
+        }
+    )
+    fig.update_layout(uirevision='static')
+    return fig
+
+@st.cache_data(ttl=3600, max_entries=32)
+def build_price_trend(time_data):
+    # Create date column for plotting
+    time_data = time_data.assign(date=pd.to_datetime(dict(year=time_data['year'], month=time_data['month'], day=1)))
+    
+    # One solid price line and one dashed inflation line per country, each built in a single
+    # px.line call over the tidy frame
+    fig = px.line(
+        time_data,
+        x='date',
+        y='price_per_standard_unit',
+        color='country_name',
+        markers=True,
+        render_mode='webgl'
+    )
+    fig.for_each_trace(lambda trace: trace.update(name=f'{trace.name} - Price'))
+    inflation_lines = px.line(
+        time_data,
+        x='date',
+        y='overall_inflation_rate',
+        color='country_name',
+        line_dash_sequence=['dash'],
+        render_mode='webgl'
+    )
+    inflation_lines.for_each_trace(lambda trace: trace.update(name=f'{trace.name} - Inflation'))
+    fig.add_traces(inflation_lines.data)
+    
+    fig.update_layout(
+        title='Average Price and Inflation Rate Over Time by Country',
+        xaxis_title='Date',
+        yaxis_title='Value',
+        legend_title='Metric',
+        uirevision='static'
+    )
+    return fig
+
+# Load data; the full fact table is only loaded when Snowflake can't serve the summary queries
+filter_options = load_filter_options()
+product_data = load_product_price_data() if filter_options is None else None
+if product_data is not None:
+    filter_options = {
+        'countries': sorted(product_data['country_name'].unique()),
+        'categories': sorted(product_data['food_category'].unique()),
+        'brands': sorted(product_data['brand'].dropna().unique()),
+        'min_date': product_data['date_key'].min().date(),
+        'max_date': product_data['date_key'].max().date()
+    }
 
 # Sidebar filters
 st.sidebar.header("Filters")
 
 # Country filter
-countries = sorted(product_data['country_name'].unique())
+countries = filter_options['countries']
 selected_countries = st.sidebar.multiselect("Select Countries", countries, default=countries[:3] if len(countries) > 3 else countries, key='product_prices_countries')
 
 # Food category filter
-categories = sorted(product_data['food_category'].unique())
+categories = filter_options['categories']
 selected_categories = st.sidebar.multiselect("Select Food Categories", categories, default=categories[:3] if len(categories) > 3 else categories, key='product_prices_categories')
 
 # Brand filter (optional)
-brands = sorted(product_data['brand'].dropna().unique())
+brands = filter_options['brands']
 selected_brands = st.sidebar.multiselect("Select Brands (Optional)", brands, key='product_prices_brands')
 
 # Date range filter
-# Convert string dates to datetime objects if they're not already
-if isinstance(product_data['date_key'].iloc[0], str):
-    product_data['date_key'] = pd.to_datetime(product_data['date_key'])
-    
-min_date = product_data['date_key'].min().date()
-max_date = product_data['date_key'].max().date()
+min_date = filter_options['min_date']
+max_date = filter_options['max_date']
 date_range = st.sidebar.slider("Select Date Range", min_value=min_date, max_value=max_date, value=(min_date, max_date), key='product_prices_date_range')
 
 # Filter data based on selections
@@ -399,45 +728,37 @@ date_range = st.sidebar.slider("Select Date Range", min_value=min_date, max_valu
 start_date = pd.Timestamp(date_range[0])
 end_date = pd.Timestamp(date_range[1])
 
-filtered_data = product_data[
-    (product_data['country_name'].isin(selected_countries)) &
-    (product_data['food_category'].isin(selected_categories)) &
-    (product_data['date_key'] >= start_date) &
-    (product_data['date_key'] <= end_date)
-]
-
-if selected_brands:
-    filtered_data = filtered_data[filtered_data['brand'].isin(selected_brands)]
-
-# Filter inflation data
-# Convert inflation data date_key to datetime if it's not already
-if isinstance(inflation_data['date_key'].iloc[0], str):
-    inflation_data['date_key'] = pd.to_datetime(inflation_data['date_key'])
-
-filtered_inflation = inflation_data[
-    (inflation_data['country_name'].isin(selected_countries)) &
-    (inflation_data['date_key'] >= start_date) &
-    (inflation_data['date_key'] <= end_date)
-]
+# Summaries for the selection, from Snowflake when it is the data source
+selected_key = tuple(sorted(selected_countries))
+categories_key = tuple(sorted(selected_categories))
+brands_key = tuple(sorted(selected_brands))
+summaries = None if product_data is not None else load_price_summaries(
+    selected_key, categories_key, brands_key, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+)
+if summaries is None:
+    if product_data is None:
+        product_data = load_product_price_data()
+    summaries = summarize_prices(filter_prices(product_data, selected_key, categories_key, brands_key, start_date, end_date))
+metrics, category_price_data, time_data, scatter_data, table_data = summaries
 
 # Display metrics
 st.subheader("Key Metrics")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    avg_price = filtered_data['price_per_standard_unit'].mean()
+    avg_price = metrics['price_per_standard_unit']
     st.metric("Avg. Price per Unit", f"{avg_price:.2f}")
 
 with col2:
-    avg_inflation = filtered_data['category_inflation_rate'].mean()
+    avg_inflation = metrics['category_inflation_rate']
     st.metric("Avg. Category Inflation", f"{avg_inflation:.2f}%")
 
 with col3:
-    avg_overall_inflation = filtered_data['overall_inflation_rate'].mean()
+    avg_overall_inflation = metrics['overall_inflation_rate']
     st.metric("Avg. Overall Inflation", f"{avg_overall_inflation:.2f}%")
 
 with col4:
-    avg_deviation = filtered_data['price_deviation_from_inflation'].mean()
+    avg_deviation = metrics['price_deviation_from_inflation']
     st.metric("Avg. Price Deviation", f"{avg_deviation:.2f}")
 
 # Visualizations
@@ -448,87 +769,20 @@ tab1, tab2, tab3 = st.tabs(["Price by Category", "Price vs. Inflation", "Price T
 
 with tab1:
     # Average price by food category
-    category_price_data = filtered_data.groupby('food_category')['price_per_standard_unit'].mean().reset_index()
-    category_price_data = category_price_data.sort_values('price_per_standard_unit', ascending=False)
-    
-    fig1 = px.bar(
-        category_price_data,
-        x='food_category',
-        y='price_per_standard_unit',
-        title='Average Price per Standard Unit by Food Category',
-        labels={'food_category': 'Food Category', 'price_per_standard_unit': 'Avg. Price per Unit'},
-        color='food_category'
-    )
-    st.plotly_chart(fig1, use_container_width=True, key='price_category_bar')
+    st.plotly_chart(build_category_bar(category_price_data), use_container_width=True, config=PLOTLY_CONFIG, key='price_category_bar')
     
 with tab2:
     # Scatter plot of price vs. inflation rate
-    fig2 = px.scatter(
-        filtered_data,
-        x='category_inflation_rate',
-        y='price_per_standard_unit',
-        color='food_category',
-        size='price_value',
-        hover_name='product_name',
-        hover_data=['brand', 'country_name', 'date_key'],
-        title='Product Price vs. Category Inflation Rate',
-        labels={
-            'category_inflation_rate': 'Category Inflation Rate (%)',
-            'price_per_standard_unit': 'Price per Standard Unit',
-            'food_category': 'Food Category'
-        }
-    )
-    st.plotly_chart(fig2, use_container_width=True, key='price_inflation_scatter')
+    st.plotly_chart(build_price_scatter(scatter_data), use_container_width=True, config=PLOTLY_CONFIG, key='price_inflation_scatter')
     
 with tab3:
     # Time series of prices and inflation
-    # Aggregate by month and country
-    time_data = filtered_data.groupby(['year', 'month', 'country_name'])[
-        ['price_per_standard_unit', 'category_inflation_rate', 'overall_inflation_rate']
-    ].mean().reset_index()
-    
-    # Create date column for plotting
-    time_data['date'] = pd.to_datetime(time_data['year'].astype(str) + '-' + time_data['month'].astype(str))
-    
-    # Create time series plot
-    fig3 = go.Figure()
-    
-    for country in time_data['country_name'].unique():
-        country_data = time_data[time_data['country_name'] == country]
-        
-        fig3.add_trace(go.Scatter(
-            x=country_data['date'],
-            y=country_data['price_per_standard_unit'],
-            mode='lines+markers',
-            name=f'{country} - Price',
-            line=dict(dash='solid')
-        ))
-        
-        fig3.add_trace(go.Scatter(
-            x=country_data['date'],
-            y=country_data['overall_inflation_rate'],
-            mode='lines',
-            name=f'{country} - Inflation',
-            line=dict(dash='dash')
-        ))
-    
-    fig3.update_layout(
-        title='Average Price and Inflation Rate Over Time by Country',
-        xaxis_title='Date',
-        yaxis_title='Value',
-        legend_title='Metric'
-    )
-    
-    st.plotly_chart(fig3, use_container_width=True, key='price_time_series')
+    st.plotly_chart(build_price_trend(time_data), use_container_width=True, config=PLOTLY_CONFIG, key='price_time_series')
 
 # Data table
 st.subheader("Product Data")
 st.dataframe(
-    filtered_data[[
-        'product_name', 'brand', 'country_name', 'food_category',
-        'price_value', 'price_currency', 'price_per_standard_unit', 'standard_unit',
-        'category_inflation_rate', 'overall_inflation_rate', 'date_key'
-    ]].sort_values('price_per_standard_unit', ascending=False),
+    table_data,
     use_container_width=True,
     key='product_data_table'
 )
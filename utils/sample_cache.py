@@ -0,0 +1,37 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+import pandas as pd
+
+# Sample frames are kept as parquet files in the temp directory so fresh sessions skip the generators.
+# The file name carries a hash of the page that generates the frame, so changing the generator or the
+# column preparation starts a new file instead of serving one written by an older revision
+def sample_path(name, source_file):
+    version = hashlib.sha1(Path(source_file).read_bytes()).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f'sample_{name}_{version}.parquet'
+
+# The cached frame, or None when the file is missing, unreadable or doesn't have the expected columns,
+# in which case the caller regenerates it
+def read_sample(path, columns):
+    try:
+        df = pd.read_parquet(path, engine='pyarrow')
+    except Exception:
+        return None
+    if list(df.columns) != list(columns):
+        return None
+    return df
+
+# Write to a temporary file next to the target and rename it into place, so a reader never sees a
+# partly written file; if the write fails the frame is still returned, just not cached
+def save_sample(df, path):
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.stem}.', suffix='.tmp')
+        os.close(fd)
+        df.to_parquet(tmp_path, engine='pyarrow', compression='zstd')
+        os.replace(tmp_path, path)
+    except (OSError, ValueError, TypeError):
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return df